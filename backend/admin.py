@@ -0,0 +1,101 @@
+"""
+Streaming inspection of every user's data, for administrators.
+
+GET /admin/apps and GET /admin/users, and `python -m backend.view_data`,
+read rows in id order through a cursor in ADMIN_CHUNK_SIZE chunks
+(yield_per) and write each chunk as NDJSON before fetching the next, so
+memory stays flat on any table size.
+
+Pages are keyset-paginated on the id: a page holds at most `limit` rows
+with ids above `after_id`, and the next page starts after the id of the
+last row received. A page shorter than `limit` is the last one.
+
+Without a user filter the query walks the table in rowid order and tests
+the other filters on each row (they are wrapped in likely(), which keeps
+SQLite from using a status or date index and then sorting every match by
+id). With one, it reads that user's rows through the per-user indexes and
+sorts them, which is bounded by the size of one account.
+
+Access is for the accounts whose user id is in ADMIN_USER_IDS
+(comma-separated), and only while the account is active, which is checked
+against the database on each request. Ids cannot be chosen or changed by
+users, unlike email addresses: signing up as a case variant of an admin's
+address, or moving one's own account to an admin address, grants nothing.
+"""
+
+import os
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Iterator, List, Optional
+
+from sqlalchemy import func
+from sqlmodel import Session, select
+
+from backend.db import engine
+from backend.exports import ndjson_lines
+from backend.models import Application, User
+
+ADMIN_USER_IDS = {int(user_id) for user_id in os.getenv("ADMIN_USER_IDS", "").split(",") if user_id.strip()}
+ADMIN_CHUNK_SIZE = int(os.getenv("ADMIN_CHUNK_SIZE", "1000"))
+# Rows per page unless the request asks for another `limit`
+ADMIN_PAGE_ROWS = 10000
+ADMIN_MAX_PAGE_ROWS = 1000000
+
+APP_COLUMNS = list(Application.__table__.columns)
+USER_COLUMNS = [column for column in User.__table__.columns if column.name != "password_hash"]
+
+
+@dataclass
+class AppFilters:
+    user_id: Optional[int] = None
+    status: Optional[str] = None
+    # applied_date in [applied_from, applied_to)
+    applied_from: Optional[datetime] = None
+    applied_to: Optional[datetime] = None
+
+    def clauses(self) -> List[object]:
+        terms = []
+        if self.status is not None:
+            terms.append(Application.status == self.status)
+        if self.applied_from is not None:
+            terms.append(Application.applied_date >= self.applied_from)
+        if self.applied_to is not None:
+            terms.append(Application.applied_date < self.applied_to)
+        clauses = [func.likely(term) for term in terms]
+        if self.user_id is not None:
+            clauses.insert(0, Application.user_id == self.user_id)
+        return clauses
+
+
+def is_admin(session: Session, user_id: int) -> bool:
+    if int(user_id) not in ADMIN_USER_IDS:
+        return False
+    user = session.get(User, int(user_id))
+    return user is not None and user.is_active
+
+
+def apps_query(filters: AppFilters, after_id: int = 0, limit: Optional[int] = ADMIN_PAGE_ROWS):
+    query = select(*APP_COLUMNS).where(Application.id > after_id, *filters.clauses()).order_by(Application.id)
+    return query.limit(limit) if limit is not None else query
+
+
+def users_query(after_id: int = 0, limit: Optional[int] = ADMIN_PAGE_ROWS):
+    query = select(*USER_COLUMNS).where(User.id > after_id).order_by(User.id)
+    return query.limit(limit) if limit is not None else query
+
+
+def stream_ndjson(query, columns) -> Iterator[str]:
+    """The rows of `query` as NDJSON, one string per chunk of ADMIN_CHUNK_SIZE rows."""
+    names = [column.name for column in columns]
+    with Session(engine) as session:
+        result = session.exec(query.execution_options(yield_per=ADMIN_CHUNK_SIZE))
+        for rows in result.partitions():
+            yield ndjson_lines(names, rows)
+
+
+def stream_apps(filters: AppFilters, after_id: int = 0, limit: Optional[int] = ADMIN_PAGE_ROWS) -> Iterator[str]:
+    return stream_ndjson(apps_query(filters, after_id, limit), APP_COLUMNS)
+
+
+def stream_users(after_id: int = 0, limit: Optional[int] = ADMIN_PAGE_ROWS) -> Iterator[str]:
+    return stream_ndjson(users_query(after_id, limit), USER_COLUMNS)
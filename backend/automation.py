@@ -0,0 +1,415 @@
+"""
+Follow-up automation engine.
+
+Every automatic status transition is expressed as one SQL predicate over the
+application table. For each rule the notification and timeline rows are
+written with INSERT ... SELECT from that predicate, then the matching rows are
+moved with a single UPDATE, so the cost is a handful of statements instead of
+one ORM object per row.
+
+A full pass is split into chunks of users so that no write transaction spans
+the whole table:
+
+1. plan: the users with anything due, in user id order, grouped into ranges
+   of about AUTOMATION_CHUNK_ROWS due applications (a larger tenant gets a
+   chunk to itself);
+2. evaluate: per chunk, the ids each rule would move. This is the index work
+   and runs in a read-only session, on AUTOMATION_WORKERS threads if set;
+3. write: per chunk, in order and from one thread, the statements above
+   restricted to those ids (the predicate is re-checked, so rows changed
+   since evaluation are left alone), committed together with a checkpoint.
+
+The checkpoint is the last user id written, kept on the pass's CronLog row. A
+pass that dies part way leaves it set and the next one resumes after it; a
+completed pass clears it and stamps last_run. Anything that became due behind
+the checkpoint meanwhile is picked up by the following pass. Every full pass
+is also recorded in the run history (backend/runs.py).
+"""
+
+import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import DateTime, and_, func, insert, literal, update
+from sqlalchemy.sql.elements import BooleanClauseList
+from sqlmodel import Session, select
+
+from backend.events import NotificationHub
+from backend.models import AppNotification, Application, ApplicationTimeline, CronLog
+from backend.runs import RunStats, finish_run, start_run
+
+FOLLOWUP_JOB_NAME = "followup_check"
+
+# Due applications per chunk, i.e. per write transaction of a full pass
+AUTOMATION_CHUNK_ROWS = int(os.getenv("AUTOMATION_CHUNK_ROWS", "1000"))
+# Threads evaluating chunks ahead of the writer; 0 evaluates inline
+AUTOMATION_WORKERS = int(os.getenv("AUTOMATION_WORKERS", "0"))
+# Ids bound per statement, well under SQLite's variable limit
+MAX_BOUND_IDS = 10000
+
+# How long a followed-up application waits for a reply before it is marked not-responded
+NO_RESPONSE_AFTER = timedelta(days=7)
+
+
+def _followup_date_reached(now: datetime):
+    # A follow-up date is reached on its calendar day, so everything before
+    # tomorrow's midnight is due.
+    tomorrow = datetime.combine(now.date() + timedelta(days=1), datetime.min.time())
+    return and_(Application.followup_date.is_not(None), Application.followup_date < tomorrow)
+
+
+def _start_of_followup_day(followup_date: datetime) -> datetime:
+    return datetime.combine(followup_date.date(), datetime.min.time())
+
+
+def _no_response_window_passed(now: datetime):
+    return and_(
+        Application.followed_up_at.is_not(None),
+        Application.followed_up_at <= now - NO_RESPONSE_AFTER,
+    )
+
+
+def _end_of_no_response_window(followed_up_at: datetime) -> datetime:
+    return followed_up_at + NO_RESPONSE_AFTER
+
+
+@dataclass(frozen=True)
+class TransitionRule:
+    name: str
+    from_status: str
+    to_status: str
+    message_prefix: str
+    timeline_note: str
+    is_due: Callable[[datetime], object]
+    # The column that decides when a row becomes due, and the moment a given
+    # value of it does; due_at must not decrease as the value grows
+    due_column: object
+    due_at: Callable[[datetime], datetime]
+
+    def predicate(self, now: datetime, user_id: Optional[int] = None):
+        if user_id is not None:
+            return self.within(now, Application.user_id == user_id)
+        return and_(Application.status == self.from_status, self.is_due(now))
+
+    def within(self, now: datetime, clause):
+        """
+        The predicate narrowed by `clause` (a user, a batch of users or of
+        application ids). The rule's own terms are wrapped in likely(), which
+        tells SQLite they are not selective, so it drives the query from the
+        index for `clause` rather than scanning every user's due rows through
+        the (status, deadline) index.
+        """
+        due = self.is_due(now)
+        due_terms = list(due.clauses) if isinstance(due, BooleanClauseList) else [due]
+        terms = [Application.status == self.from_status, *due_terms]
+        return and_(clause, *(func.likely(term) for term in terms))
+
+
+TRANSITION_RULES = (
+    TransitionRule(
+        name="active->pending",
+        from_status="active",
+        to_status="pending",
+        message_prefix="Follow-up date reached for ",
+        timeline_note="Status auto-switched from active to pending by automation",
+        is_due=_followup_date_reached,
+        due_column=Application.followup_date,
+        due_at=_start_of_followup_day,
+    ),
+    TransitionRule(
+        name="followed-up->not-responded",
+        from_status="followed-up",
+        to_status="not-responded",
+        message_prefix="No response from ",
+        timeline_note="Status auto-switched from followed-up to not-responded by automation",
+        is_due=_no_response_window_passed,
+        due_column=Application.followed_up_at,
+        due_at=_end_of_no_response_window,
+    ),
+)
+
+
+def _batches(ids: List[int], size: int = MAX_BOUND_IDS) -> Iterator[List[int]]:
+    for start in range(0, len(ids), size):
+        yield ids[start:start + size]
+
+
+def apply_transitions(
+    session: Session,
+    now: datetime,
+    user_id: Optional[int] = None,
+    candidates: Optional[Dict[str, List[int]]] = None,
+    stats: Optional[RunStats] = None,
+) -> Dict[str, int]:
+    """
+    Apply every transition rule inside the caller's transaction.
+
+    With `candidates` (from due_ids) each rule only considers those
+    application ids. Returns the number of applications moved per rule, and
+    adds the notifications created to `stats`. The caller commits.
+    """
+    transitions = {}
+    for rule in TRANSITION_RULES:
+        if candidates is None:
+            statements = [rule.predicate(now, user_id)]
+        else:
+            batches = _batches(candidates.get(rule.name, []))
+            statements = [rule.within(now, Application.id.in_(batch)) for batch in batches]
+        transitions[rule.name] = 0
+        for due in statements:
+            notified, moved = _apply_rule(session, rule, due, now)
+            transitions[rule.name] += moved
+            if stats is not None:
+                stats.notifications_created += notified
+    return transitions
+
+
+def _apply_rule(session: Session, rule: TransitionRule, due, now: datetime) -> Tuple[int, int]:
+    """(notifications created, applications moved) for one rule."""
+    notified = session.exec(
+        insert(AppNotification).from_select(
+            ["app_id", "user_id", "message", "created_at", "read"],
+            select(
+                Application.id,
+                Application.user_id,
+                literal(rule.message_prefix) + Application.company_name + " - " + Application.role_title,
+                literal(now, DateTime),
+                literal(False),
+            ).where(due),
+        )
+    )
+    session.exec(
+        insert(ApplicationTimeline).from_select(
+            ["app_id", "user_id", "event_time", "event_type", "old_status", "new_status", "notes"],
+            select(
+                Application.id,
+                Application.user_id,
+                literal(now, DateTime),
+                literal("status-changed"),
+                literal(rule.from_status),
+                literal(rule.to_status),
+                literal(rule.timeline_note),
+            ).where(due),
+        )
+    )
+    moved = session.exec(
+        update(Application).where(due).values(status=rule.to_status)
+    )
+    return notified.rowcount, moved.rowcount
+
+
+def next_due_time(session: Session) -> Optional[datetime]:
+    """
+    When the earliest pending transition becomes due, or None if nothing is
+    waiting. One MIN per rule over its (status, due column) index.
+    """
+    deadlines = []
+    for rule in TRANSITION_RULES:
+        earliest = session.exec(
+            select(func.min(rule.due_column)).where(Application.status == rule.from_status)
+        ).one()
+        if earliest is not None:
+            deadlines.append(rule.due_at(earliest))
+    return min(deadlines, default=None)
+
+
+def due_time(app: Application) -> Optional[datetime]:
+    """When `app` itself becomes due for a transition, if ever."""
+    for rule in TRANSITION_RULES:
+        value = getattr(app, rule.due_column.key)
+        if app.status == rule.from_status and value is not None:
+            return rule.due_at(value)
+    return None
+
+
+def record_last_run(session: Session, now: datetime, job_name: str = FOLLOWUP_JOB_NAME):
+    """Stamp a completed full pass, clearing its checkpoint."""
+    cron_entry = session.exec(select(CronLog).where(CronLog.job_name == job_name)).first()
+    if cron_entry:
+        cron_entry.last_run = now
+        cron_entry.checkpoint = None
+    else:
+        cron_entry = CronLog(job_name=job_name, last_run=now)
+    session.add(cron_entry)
+
+
+def read_checkpoint(session: Session, job_name: str = FOLLOWUP_JOB_NAME) -> Optional[int]:
+    """The last user id written by an unfinished full pass, if there is one."""
+    return session.exec(select(CronLog.checkpoint).where(CronLog.job_name == job_name)).first()
+
+
+def save_checkpoint(session: Session, user_id: int, now: datetime, job_name: str = FOLLOWUP_JOB_NAME):
+    cron_entry = session.exec(select(CronLog).where(CronLog.job_name == job_name)).first()
+    if cron_entry is None:
+        # Very first pass; last_run is stamped again when it completes
+        cron_entry = CronLog(job_name=job_name, last_run=now)
+    cron_entry.checkpoint = user_id
+    session.add(cron_entry)
+
+
+def plan_chunks(
+    session: Session,
+    now: datetime,
+    after: Optional[int] = None,
+    chunk_rows: int = AUTOMATION_CHUNK_ROWS,
+) -> List[List[int]]:
+    """
+    The users with anything due (above `after`), in id order, grouped so each
+    group has about `chunk_rows` due applications. A user with more than that
+    forms a group alone.
+    """
+    due_per_user: Dict[int, int] = {}
+    for rule in TRANSITION_RULES:
+        query = select(Application.user_id, func.count()).where(rule.predicate(now)).group_by(Application.user_id)
+        if after is not None:
+            query = query.where(Application.user_id > after)
+        for user_id, count in session.exec(query):
+            due_per_user[user_id] = due_per_user.get(user_id, 0) + count
+
+    chunks, current, rows = [], [], 0
+    for user_id in sorted(due_per_user):
+        if current and rows + due_per_user[user_id] > chunk_rows:
+            chunks.append(current)
+            current, rows = [], 0
+        current.append(user_id)
+        rows += due_per_user[user_id]
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def due_ids(session: Session, now: datetime, user_ids: List[int]) -> Dict[str, List[int]]:
+    """Ids of the given users' applications that each rule would move now."""
+    candidates = {}
+    for rule in TRANSITION_RULES:
+        candidates[rule.name] = [
+            app_id
+            for batch in _batches(user_ids)
+            for app_id in session.exec(
+                select(Application.id).where(rule.within(now, Application.user_id.in_(batch)))
+            )
+        ]
+    return candidates
+
+
+def _evaluated(engine, now: datetime, chunks: List[List[int]], workers: int) -> Iterator[Tuple[List[int], Dict]]:
+    """(user ids, due_ids) per chunk, in chunk order, evaluated up to 2 * workers chunks ahead."""
+    def evaluate(user_ids):
+        with Session(engine) as session:
+            return user_ids, due_ids(session, now, user_ids)
+
+    if workers <= 0:
+        for user_ids in chunks:
+            yield evaluate(user_ids)
+        return
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="automation") as executor:
+        pending = deque()
+        for user_ids in chunks:
+            pending.append(executor.submit(evaluate, user_ids))
+            if len(pending) > 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def _write(
+    engine,
+    now: datetime,
+    listeners: set,
+    notify: Optional[NotificationHub],
+    user_id: Optional[int] = None,
+    candidates: Optional[Dict[str, List[int]]] = None,
+    checkpoint: Optional[int] = None,
+    stats: Optional[RunStats] = None,
+    users: Iterable[int] = (),
+    on_commit: Optional[Callable[[Iterable[int]], None]] = None,
+) -> Dict[str, int]:
+    """
+    Apply the transitions in one transaction and add them to `stats` once
+    committed. Then tell `on_commit` about `users` if anything moved, and
+    publish the notifications created for `listeners`: they are read back as
+    a primary-key range above the pre-write high-water mark.
+    """
+    with Session(engine) as session:
+        watermark = None
+        if listeners:
+            watermark = session.exec(select(func.max(AppNotification.id))).one() or 0
+        written = RunStats()
+        transitions = apply_transitions(session, now, user_id=user_id, candidates=candidates, stats=written)
+        if checkpoint is not None:
+            save_checkpoint(session, checkpoint, now)
+        session.commit()
+        if stats is not None:
+            stats.notifications_created += written.notifications_created
+            for name, count in transitions.items():
+                stats.transitions[name] = stats.transitions.get(name, 0) + count
+        if on_commit is not None and any(transitions.values()):
+            on_commit(users)
+
+        if listeners and any(transitions.values()):
+            created = session.exec(
+                select(AppNotification)
+                .where(AppNotification.id > watermark, AppNotification.user_id.in_(listeners))
+                .order_by(AppNotification.id)
+            ).all()
+            notify.publish_notifications(created)
+    return transitions
+
+
+def run_followup_pass(
+    engine,
+    now: Optional[datetime] = None,
+    user_id: Optional[int] = None,
+    notify: Optional[NotificationHub] = None,
+    workers: int = AUTOMATION_WORKERS,
+    chunk_rows: int = AUTOMATION_CHUNK_ROWS,
+    on_commit: Optional[Callable[[Iterable[int]], None]] = None,
+) -> Dict[str, int]:
+    """
+    Run one automation pass and return the number of applications moved per rule.
+
+    With `user_id` only that user's applications are considered (through the
+    (user_id, status) index), in one transaction, and the CronLog is left
+    alone since this is not a full pass. Without it every user is processed
+    chunk by chunk, resuming after the checkpoint of an unfinished pass, and
+    the CronLog is stamped at the end.
+
+    With `notify`, notifications created for users that currently have a
+    stream open are published to the hub as each transaction commits.
+    `on_commit` is called after each transaction that moved applications,
+    with the ids of the users it covered (all of whom had something due).
+    """
+    now = now or datetime.utcnow()
+    listeners = notify.subscribed_users() if notify else set()
+
+    if user_id is not None:
+        return _write(engine, now, listeners & {user_id}, notify, user_id=user_id, users=[user_id], on_commit=on_commit)
+
+    run_id = start_run(engine, FOLLOWUP_JOB_NAME, now)
+    stats = RunStats(transitions={rule.name: 0 for rule in TRANSITION_RULES})
+    started = time.perf_counter()
+    try:
+        with Session(engine) as session:
+            chunks = plan_chunks(session, now, after=read_checkpoint(session), chunk_rows=chunk_rows)
+        stats.chunks = len(chunks)
+
+        for user_ids, candidates in _evaluated(engine, now, chunks, workers):
+            stats.rows_scanned += sum(len(ids) for ids in candidates.values())
+            _write(
+                engine, now, listeners & set(user_ids), notify,
+                candidates=candidates, checkpoint=user_ids[-1], stats=stats, users=user_ids, on_commit=on_commit,
+            )
+
+        with Session(engine) as session:
+            record_last_run(session, now)
+            session.commit()
+    except Exception as exc:
+        finish_run(engine, run_id, stats, (time.perf_counter() - started) * 1000, error=f"{type(exc).__name__}: {exc}")
+        raise
+    finish_run(engine, run_id, stats, (time.perf_counter() - started) * 1000)
+    return stats.transitions
@@ -0,0 +1,141 @@
+"""
+Side-by-side load benchmark of the sync and async database modes (DB_MODE).
+
+Usage (from the repo root; needs httpx):
+    python -m backend.benchmarks.bench_async
+    python -m backend.benchmarks.bench_async --concurrency 50 200 1000 --apps 20000
+
+For each mode a uvicorn server is started on a fresh temporary database
+holding `--apps` applications, one account logs in, and `--concurrency`
+clients hammer GET /apps, /metrics and /notifications until `--requests`
+requests have completed. Reported: throughput, p50/p99 latency and errors.
+"""
+
+import argparse
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+from sqlalchemy import update
+from sqlmodel import SQLModel
+
+from backend.benchmarks.bench_cron import populate
+from backend.db import make_engine
+from backend.migrations import upgrade
+from backend.passwords import pwd_context
+from backend.models import User
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+EMAIL, PASSWORD = "user1@example.com", "Benchmark1"
+PATHS = ["/apps?limit=50", "/metrics", "/notifications"]
+
+
+def prepare_database(directory, n_apps):
+    engine = make_engine(database_url(directory))
+    SQLModel.metadata.create_all(engine)
+    upgrade(engine)
+    populate(engine, n_apps, due_ratio=0.05, users=100)
+    with engine.begin() as conn:
+        password_hash = pwd_context.hash(PASSWORD)
+        conn.execute(update(User).where(User.email == EMAIL).values(password_hash=password_hash))
+    engine.dispose()
+
+
+def database_url(directory):
+    return f"sqlite:///{os.path.join(directory, 'apptrackr.db')}"
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(directory, mode, port, **extra_env):
+    env = dict(os.environ, DB_MODE=mode, DATABASE_URL=database_url(directory), PYTHONPATH=REPO_ROOT, **extra_env)
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "backend.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=directory, env=env,
+    )
+    for _ in range(100):
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/cron/last-run", timeout=1)
+            return server
+        except httpx.TransportError:
+            time.sleep(0.1)
+    server.kill()
+    raise RuntimeError(f"uvicorn ({mode}) did not start")
+
+
+async def drive(base_url, token, concurrency, total):
+    latencies, errors = [], 0
+    remaining = total
+    headers = {"Authorization": f"Bearer {token}"}
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, headers=headers, limits=limits, timeout=60) as client:
+        async def worker(n):
+            nonlocal remaining, errors
+            while remaining > 0:
+                remaining -= 1
+                start = time.perf_counter()
+                try:
+                    resp = await client.get(PATHS[n % len(PATHS)])
+                    if resp.status_code != 200:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append(time.perf_counter() - start)
+                n += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(i) for i in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "rps": len(latencies) / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+        "errors": errors,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[50, 200, 1000])
+    parser.add_argument("--apps", type=int, default=20000)
+    parser.add_argument("--requests", type=int, default=3000, help="requests per concurrency level")
+    args = parser.parse_args()
+
+    results = {}
+    for mode in ("sync", "async"):
+        with tempfile.TemporaryDirectory() as directory:
+            prepare_database(directory, args.apps)
+            port = free_port()
+            server = start_server(directory, mode, port)
+            try:
+                base_url = f"http://127.0.0.1:{port}"
+                token = httpx.post(f"{base_url}/login", json={"email": EMAIL, "password": PASSWORD}).json()["token"]
+                for concurrency in args.concurrency:
+                    total = max(args.requests, concurrency * 2)
+                    results[(mode, concurrency)] = asyncio.run(drive(base_url, token, concurrency, total))
+            finally:
+                server.terminate()
+                server.wait()
+
+    print(f"{'clients':>8}  {'mode':>5}  {'req/s':>8}  {'p50':>9}  {'p99':>9}  {'errors':>6}")
+    for concurrency in args.concurrency:
+        for mode in ("sync", "async"):
+            r = results[(mode, concurrency)]
+            print(f"{concurrency:>8}  {mode:>5}  {r['rps']:>8.0f}  {r['p50_ms']:>7.1f}ms  {r['p99_ms']:>7.1f}ms  {r['errors']:>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""
+Benchmark one automation pass (run_followup_pass) against table size.
+
+Usage (from the repo root):
+    python -m backend.benchmarks.bench_cron
+    python -m backend.benchmarks.bench_cron --sizes 10000 100000 300000 --due-ratio 0.05
+    python -m backend.benchmarks.bench_cron --sizes 1000000 --users 10000 --chunk-rows 2000 100000000 --workers 0 2
+
+Each size is populated once into a temporary SQLite file, with the schema
+and triggers of a migrated database; every (chunk rows, workers) combination
+then runs on a fresh copy of it. Applications are spread over statuses with
+`--due-ratio` of the active / followed-up rows past their deadline. The first
+pass moves the due rows; the second pass is the steady state where nothing
+is due. A huge `--chunk-rows` puts the whole pass in one write transaction.
+
+While the first pass runs, a probe thread keeps making single-row updates,
+like API requests, and the slowest of them shows how long a writer waited
+behind the automation.
+"""
+
+import argparse
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert, text
+from sqlmodel import SQLModel
+
+from backend.automation import AUTOMATION_CHUNK_ROWS, run_followup_pass
+from backend.db import make_engine
+from backend.migrations import upgrade
+from backend.models import Application, User
+
+STATUSES = ["active", "pending", "followed-up", "not-responded", "rejected", "accepted"]
+
+
+def populate(engine, n_apps, due_ratio, users=1000, seed=42):
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        conn.execute(insert(User), [
+            {"email": f"user{i}@example.com", "password_hash": "x", "name": f"User {i}",
+             "created_at": now, "is_active": True}
+            for i in range(1, users + 1)
+        ])
+        batch = []
+        for i in range(n_apps):
+            status = rng.choice(STATUSES)
+            due = rng.random() < due_ratio
+            followup_date = now + (timedelta(days=-1) if due else timedelta(days=rng.randint(2, 30)))
+            followed_up_at = None
+            if status == "followed-up":
+                followed_up_at = now - (timedelta(days=8) if due else timedelta(days=rng.randint(0, 6)))
+            batch.append({
+                "user_id": rng.randint(1, users),
+                "company_name": f"Company {i}",
+                "role_title": "Engineer",
+                "city": "Remote",
+                "country": "India",
+                "applied_date": now - timedelta(days=rng.randint(0, 60)),
+                "followup_date": followup_date,
+                "status": status,
+                "followed_up_at": followed_up_at,
+                "updated_at": now,
+            })
+            if len(batch) == 10000:
+                conn.execute(insert(Application), batch)
+                batch = []
+        if batch:
+            conn.execute(insert(Application), batch)
+
+
+class WriteProbe(threading.Thread):
+    """Single-row update transactions in a loop, recording each one's latency."""
+
+    def __init__(self, engine, n_apps, interval=0.005):
+        super().__init__(daemon=True)
+        self.engine = engine
+        self.n_apps = n_apps
+        self.interval = interval
+        self.latencies = []
+        self.stopped = threading.Event()
+
+    def run(self):
+        rng = random.Random(1)
+        statement = text("UPDATE application SET updated_at = :now WHERE id = :id")
+        while not self.stopped.is_set():
+            start = time.perf_counter()
+            with self.engine.begin() as conn:
+                conn.execute(statement, {"now": datetime.utcnow(), "id": rng.randint(1, self.n_apps)})
+            self.latencies.append(time.perf_counter() - start)
+            time.sleep(self.interval)
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+        return max(self.latencies, default=0.0)
+
+
+def bench_pass(template, n_apps, chunk_rows, workers):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        shutil.copy(template, path)
+        engine = make_engine(f"sqlite:///{path}")
+
+        probe = WriteProbe(engine, n_apps)
+        probe.start()
+        start = time.perf_counter()
+        transitions = run_followup_pass(engine, chunk_rows=chunk_rows, workers=workers)
+        first = time.perf_counter() - start
+        worst_wait = probe.stop()
+
+        start = time.perf_counter()
+        run_followup_pass(engine, chunk_rows=chunk_rows, workers=workers)
+        steady = time.perf_counter() - start
+
+        engine.dispose()
+    return first, steady, sum(transitions.values()), worst_wait
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--due-ratio", type=float, default=0.05)
+    parser.add_argument("--chunk-rows", type=int, nargs="+", default=[AUTOMATION_CHUNK_ROWS])
+    parser.add_argument("--workers", type=int, nargs="+", default=[0])
+    args = parser.parse_args()
+
+    print(f"{'applications':>12}  {'chunk rows':>10}  {'workers':>7}  {'moved':>8}  {'first pass':>11}  "
+          f"{'moved/s':>9}  {'steady pass':>11}  {'max write wait':>14}")
+    for n in args.sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            template = os.path.join(tmp, "template.db")
+            engine = make_engine(f"sqlite:///{template}")
+            SQLModel.metadata.create_all(engine)
+            upgrade(engine)
+            populate(engine, n, args.due_ratio, users=args.users)
+            engine.dispose()
+
+            for chunk_rows in args.chunk_rows:
+                for workers in args.workers:
+                    first, steady, moved, wait = bench_pass(template, n, chunk_rows, workers)
+                    print(f"{n:>12}  {chunk_rows:>10}  {workers:>7}  {moved:>8}  {first * 1000:>9.1f}ms  "
+                          f"{moved / first:>9.0f}  {steady * 1000:>9.1f}ms  {wait * 1000:>12.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Login storm benchmark: bcrypt throughput versus cheap-endpoint latency.
+
+Usage (from the repo root; needs httpx):
+    python -m backend.benchmarks.bench_login
+    python -m backend.benchmarks.bench_login --logins 50 200 --rounds 10 12 --seconds 10
+
+For each BCRYPT_ROUNDS value a uvicorn server is started on a fresh temporary
+database. One client first measures GET /apps alone (the baseline); then
+`--logins` clients post to /login in a loop while the same probe keeps
+requesting /apps. Reported per run: successful logins per second, logins
+turned away with 503, and /apps p50/p99 latency under the storm.
+"""
+
+import argparse
+import asyncio
+import statistics
+import tempfile
+import time
+
+import httpx
+
+from backend.benchmarks.bench_async import EMAIL, PASSWORD, free_port, prepare_database, start_server
+
+PROBE_PATH = "/apps?limit=50"
+
+
+def percentiles(latencies):
+    latencies = sorted(latencies)
+    return statistics.median(latencies) * 1000, latencies[max(int(len(latencies) * 0.99) - 1, 0)] * 1000
+
+
+async def probe(client, token, stop):
+    latencies = []
+    headers = {"Authorization": f"Bearer {token}"}
+    while not stop.is_set():
+        start = time.perf_counter()
+        await client.get(PROBE_PATH, headers=headers)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+async def storm(base_url, token, concurrency, seconds):
+    counts = {"ok": 0, "rejected": 0, "errors": 0}
+    stop = asyncio.Event()
+    limits = httpx.Limits(max_connections=concurrency + 1, max_keepalive_connections=concurrency + 1)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        async def login_loop():
+            while not stop.is_set():
+                try:
+                    resp = await client.post("/login", json={"email": EMAIL, "password": PASSWORD})
+                except httpx.HTTPError:
+                    counts["errors"] += 1
+                    continue
+                if resp.status_code == 200:
+                    counts["ok"] += 1
+                elif resp.status_code == 503:
+                    counts["rejected"] += 1
+                    await asyncio.sleep(float(resp.headers.get("Retry-After", 1)))
+                else:
+                    counts["errors"] += 1
+
+        # Baseline: the probe on its own
+        baseline_stop = asyncio.Event()
+        baseline = asyncio.create_task(probe(client, token, baseline_stop))
+        await asyncio.sleep(min(seconds, 3))
+        baseline_stop.set()
+        baseline_latencies = await baseline
+
+        probe_task = asyncio.create_task(probe(client, token, stop))
+        logins = [asyncio.create_task(login_loop()) for _ in range(concurrency)]
+        start = time.perf_counter()
+        await asyncio.sleep(seconds)
+        stop.set()
+        await asyncio.gather(*logins)
+        elapsed = time.perf_counter() - start
+        storm_latencies = await probe_task
+
+    return {
+        "logins_per_s": counts["ok"] / elapsed,
+        "rejected": counts["rejected"],
+        "errors": counts["errors"],
+        "baseline": percentiles(baseline_latencies),
+        "storm": percentiles(storm_latencies),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, nargs="+", default=[50, 200], help="concurrent login clients")
+    parser.add_argument("--rounds", type=int, nargs="+", default=[12], help="BCRYPT_ROUNDS values to compare")
+    parser.add_argument("--seconds", type=float, default=10.0, help="storm duration per run")
+    parser.add_argument("--apps", type=int, default=5000)
+    parser.add_argument("--mode", choices=["sync", "async"], default="sync")
+    args = parser.parse_args()
+
+    print(f"{'rounds':>6}  {'clients':>7}  {'logins/s':>8}  {'503s':>6}  {'errors':>6}  "
+          f"{'apps p99 idle':>13}  {'apps p50':>9}  {'apps p99':>9}")
+    for rounds in args.rounds:
+        with tempfile.TemporaryDirectory() as directory:
+            prepare_database(directory, args.apps)
+            port = free_port()
+            server = start_server(directory, args.mode, port, BCRYPT_ROUNDS=str(rounds))
+            try:
+                base_url = f"http://127.0.0.1:{port}"
+                # The first login also rehashes the seeded password to `rounds`
+                token = httpx.post(f"{base_url}/login", json={"email": EMAIL, "password": PASSWORD}, timeout=60).json()["token"]
+                for concurrency in args.logins:
+                    r = asyncio.run(storm(base_url, token, concurrency, args.seconds))
+                    print(f"{rounds:>6}  {concurrency:>7}  {r['logins_per_s']:>8.1f}  {r['rejected']:>6}  {r['errors']:>6}  "
+                          f"{r['baseline'][1]:>11.1f}ms  {r['storm'][0]:>7.1f}ms  {r['storm'][1]:>7.1f}ms")
+            finally:
+                server.terminate()
+                server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Per-request cost of MetricsMiddleware.
+
+Usage (from the repo root):
+    python -m backend.benchmarks.bench_metrics
+    python -m backend.benchmarks.bench_metrics --requests 20000 --rounds 10
+
+Builds an app with the same routes as backend.main, every one answering with
+an empty 204, and calls it directly over ASGI (no server, no sockets) with
+and without the middleware, alternating between the two for `--rounds` and
+keeping each one's best round. GET requests go to the first and the last GET
+route and to an unknown path. The difference in time per request is the
+middleware's overhead.
+"""
+
+import argparse
+import asyncio
+import re
+import time
+
+from fastapi import FastAPI, Response
+from fastapi.routing import APIRoute
+
+from backend.instrumentation import MetricsMiddleware
+
+
+def mirror_app(instrumented: bool) -> FastAPI:
+    from backend.main import app as real_app
+
+    app = FastAPI()
+    for route in real_app.routes:
+        if isinstance(route, APIRoute):
+            app.add_api_route(route.path, lambda: Response(status_code=204), methods=list(route.methods))
+    if instrumented:
+        app.add_middleware(MetricsMiddleware)
+    return app
+
+
+def get_path(app: FastAPI, index: int) -> str:
+    """A concrete path for the index-th GET route, parameters filled in with 1."""
+    routes = [route for route in app.routes if isinstance(route, APIRoute) and "GET" in route.methods]
+    return re.sub(r"\{[^}]+\}", "1", routes[index].path)
+
+
+async def run(app, path: str, n: int) -> float:
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET", "scheme": "http",
+        "path": path, "raw_path": path.encode(), "root_path": "", "query_string": b"", "headers": [],
+        "server": ("bench", 80), "client": ("bench", 1),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    start = time.perf_counter()
+    for _ in range(n):
+        await app(dict(scope), receive, send)
+    return (time.perf_counter() - start) / n
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=5000, help="requests per round")
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    plain, instrumented = mirror_app(False), mirror_app(True)
+    targets = [
+        ("first route", get_path(plain, 0)),
+        ("last route", get_path(plain, -1)),
+        ("unknown path", "/no/such/path"),
+    ]
+    print(f"{'request':>14}  {'plain':>10}  {'with metrics':>12}  {'overhead':>10}")
+    for label, path in targets:
+        # Alternate the two apps and keep the best round of each, to damp noise
+        timings = {plain: [], instrumented: []}
+        for _ in range(args.rounds):
+            for app in timings:
+                timings[app].append(asyncio.run(run(app, path, args.requests)))
+        base, with_metrics = min(timings[plain]), min(timings[instrumented])
+        print(f"{label:>14}  {base * 1e6:>8.1f}us  {with_metrics * 1e6:>10.1f}us  {(with_metrics - base) * 1e6:>8.1f}us")
+
+
+if __name__ == "__main__":
+    main()
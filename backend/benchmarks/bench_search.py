@@ -0,0 +1,97 @@
+"""
+Latency of GET /apps/search's query at increasing table sizes.
+
+Usage (from the repo root):
+    python -m backend.benchmarks.bench_search
+    python -m backend.benchmarks.bench_search --sizes 100000 500000 --users 1000
+
+Each size gets a fresh temporary database, filled with `populate` and then
+given varied text: roles, cities and notes drawn from small vocabularies, so
+words like "engineer" or "india" occur in a large share of all rows, as they
+would in practice. That mass update fragments the index, so it is then
+optimized as `python -m backend.search optimize` would. Reported per query: hits on the first page and median and
+worst latency over `--repeat` runs, for user 1.
+"""
+
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from sqlalchemy import bindparam, update
+from sqlmodel import Session, SQLModel
+
+from backend import search
+from backend.benchmarks.bench_cron import populate
+from backend.db import make_engine
+from backend.migrations import upgrade
+from backend.models import Application
+
+QUERIES = ["engineer", "eng", "data engineer mumbai", "remote india", "company 12", "referral", "nomatch"]
+
+ROLES = ["Data Engineer", "Software Engineer", "Backend Engineer", "Data Scientist", "Product Manager",
+         "ML Engineer", "Analyst", "Designer", "DevOps Engineer", "Frontend Developer"]
+PLACES = [("Mumbai", "India"), ("Pune", "India"), ("Bengaluru", "India"), ("Remote", "India"),
+          ("Berlin", "Germany"), ("London", "United Kingdom"), ("Remote", "United States"), ("Toronto", "Canada")]
+NOTES = ["referral from a former colleague", "applied through the careers portal", "recruiter reached out on LinkedIn",
+         "take-home assignment pending", "met the team at a meetup", None, None, None]
+
+
+def vary_text(engine, n_apps, seed=7):
+    rng = random.Random(seed)
+    rows = []
+    for app_id in range(1, n_apps + 1):
+        city, country = rng.choice(PLACES)
+        rows.append({"b_id": app_id, "role_title": rng.choice(ROLES), "city": city, "country": country,
+                     "notes": rng.choice(NOTES)})
+    statement = (
+        update(Application.__table__)
+        .where(Application.__table__.c.id == bindparam("b_id"))
+        .values(role_title=bindparam("role_title"), city=bindparam("city"), country=bindparam("country"),
+                notes=bindparam("notes"))
+    )
+    with engine.begin() as conn:
+        for start in range(0, len(rows), 10000):
+            conn.execute(statement, rows[start:start + 10000])
+
+
+def bench_size(n_apps, users, repeat):
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = make_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        SQLModel.metadata.create_all(engine)
+        upgrade(engine)
+        populate(engine, n_apps, due_ratio=0.05, users=users)
+        vary_text(engine, n_apps)
+        with engine.begin() as conn:
+            search.optimize(conn)
+
+        results = {}
+        with Session(engine) as session:
+            for q in QUERIES:
+                timings = []
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    apps, _ = search.search(session, q, user_id=1, limit=20)
+                    timings.append(time.perf_counter() - start)
+                results[q] = (len(apps), statistics.median(timings) * 1000, max(timings) * 1000)
+        engine.dispose()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 300_000])
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'applications':>12}  {'query':>14}  {'hits':>5}  {'median':>9}  {'max':>9}")
+    for n_apps in args.sizes:
+        for q, (hits, median, worst) in bench_size(n_apps, args.users, args.repeat).items():
+            print(f"{n_apps:>12}  {q:>14}  {hits:>5}  {median:>7.2f}ms  {worst:>7.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
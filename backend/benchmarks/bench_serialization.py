@@ -0,0 +1,117 @@
+"""
+Time to load and serialize a page of applications, per 1,000 rows.
+
+Usage (from the repo root):
+    python -m backend.benchmarks.bench_serialization
+    python -m backend.benchmarks.bench_serialization --apps 5000 --rounds 20
+
+Generates one account with `--apps` applications (backend.benchmarks.
+generate_data) in a scratch database and reads them as one GET /apps page,
+both ways:
+
+    before  whole Application entities, model_dump() per row,
+            jsonable_encoder and JSONResponse (the stdlib json module)
+    after   the ApplicationOut columns as plain rows, validated and
+            serialized by the ApplicationPage response model, ORJSONResponse
+
+"load" is the query and the event counts, "serialize" everything from the
+rows to the response body. Both ways alternate for `--rounds` and each
+keeps its best round, to damp noise. The bodies are checked to decode to
+the same items, bar user_id.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+from sqlmodel import Session, select
+
+from backend import timeline
+from backend.benchmarks.generate_data import create_database
+from backend.db import make_engine
+from backend.models import Application
+from backend.pagination import paginate
+from backend.schemas import APPLICATION_COLUMNS, ApplicationPage
+
+
+def load_before(session, user_id: int, limit: int):
+    apps, next_cursor = paginate(
+        session, select(Application).where(Application.user_id == user_id),
+        Application.updated_at, Application.id, limit,
+    )
+    counts = timeline.event_counts(session, user_id, [app.id for app in apps])
+    return {"items": [{**app.model_dump(), "event_count": counts.get(app.id, 0)} for app in apps], "next_cursor": next_cursor}
+
+
+def serialize_before(content) -> bytes:
+    return JSONResponse(jsonable_encoder(content)).body
+
+
+def load_after(session, user_id: int, limit: int):
+    apps, next_cursor = paginate(
+        session, select(*APPLICATION_COLUMNS).where(Application.user_id == user_id),
+        Application.updated_at, Application.id, limit,
+    )
+    return {"items": timeline.with_event_counts(session, user_id, apps), "next_cursor": next_cursor}
+
+
+def serialize_after(content, field) -> bytes:
+    return ORJSONResponse(asyncio.run(serialize_response(field=field, response_content=content))).body
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--apps", type=int, default=1000, help="applications on the page")
+    parser.add_argument("--rounds", type=int, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        create_database(url, users=1, apps_per_user=args.apps)
+        engine = make_engine(url)
+        # As FastAPI builds it for response_model=ApplicationPage
+        field = create_model_field(name="Response_get_apps", type_=ApplicationPage, mode="serialization")
+        ways = {
+            "before": (load_before, serialize_before),
+            "after": (load_after, lambda content: serialize_after(content, field)),
+        }
+        best = {name: (float("inf"), float("inf")) for name in ways}
+        bodies = {}
+        with Session(engine) as session:
+            for _ in range(args.rounds):
+                for name, (load, serialize) in ways.items():
+                    content, load_seconds = timed(load, session, 1, args.apps)
+                    bodies[name], serialize_seconds = timed(serialize, content)
+                    best[name] = tuple(map(min, best[name], (load_seconds, serialize_seconds)))
+        engine.dispose()
+
+    before = [{k: v for k, v in item.items() if k != "user_id"} for item in json.loads(bodies["before"])["items"]]
+    after = json.loads(bodies["after"])["items"]
+    if before != after:
+        raise SystemExit("The two ways returned different items")
+
+    per_thousand = 1000 / args.apps * 1000
+    print(f"{len(after)} applications, {len(bodies['before'])} -> {len(bodies['after'])} bytes")
+    print(f"{'per 1,000 apps':>14}  {'load':>9}  {'serialize':>9}  {'total':>9}")
+    for name, (load_seconds, serialize_seconds) in best.items():
+        print(
+            f"{name:>14}  {load_seconds * per_thousand:>7.2f}ms  {serialize_seconds * per_thousand:>7.2f}ms"
+            f"  {(load_seconds + serialize_seconds) * per_thousand:>7.2f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
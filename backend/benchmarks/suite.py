@@ -0,0 +1,420 @@
+"""
+Load-test suite: every endpoint and the automation pass at increasing sizes.
+
+Usage (from the repo root; needs httpx):
+    python -m backend.benchmarks.suite
+    python -m backend.benchmarks.suite --rows 10000 100000 1000000 --output baseline.json
+    python -m backend.benchmarks.suite --rows 10000 100000 --baseline baseline.json
+    DB_MODE=async python -m backend.benchmarks.suite --concurrency 8
+
+For each size in `--rows` a database of rows / `--apps-per-user` users is
+made with generate_data (kept in `--data-dir` and reused by later runs if
+given; its dates are relative to when it was made) and copied. A child
+process then imports backend.main against the copy, as the app's engine is
+bound to DATABASE_URL at import, and calls it in process through httpx's
+ASGITransport: no server and no sockets. The app's startup event does not
+run, so the scheduler stays off and does not compete with the requests.
+
+The child first times run_cron_updates: one pass moving what generate_data
+left due, then `--cron-passes` passes with nothing due. Then it sends each
+SCENARIOS request `--requests` times (a `share` of that for the expensive
+ones) after `--warmup` unmeasured ones, `--concurrency` at a time, as
+`--sample-users` users in turn. Writes run after the reads, and requests
+that delete something delete a different row each time.
+
+Recorded per scenario: p50 / p95 / p99 and mean latency, throughput, and
+errors (responses other than 2xx and 304). `--output` writes the results as
+JSON; `--baseline` compares this run with such a file. A scenario regresses
+when its p95 is more than `--tolerance` slower than the baseline's and by at
+least `--min-delta-ms`; the suite then exits with status 1. Compare runs
+made on the same machine, DB_MODE, BCRYPT_ROUNDS and READ_CACHE_SIZE.
+
+After the warmup, the endpoints behind the read cache (backend/cache.py)
+are mostly answered from it. Set READ_CACHE_SIZE=0 to time their database
+path instead.
+
+User 1 is made an admin (ADMIN_USER_IDS) for the /admin endpoints. Not
+driven: GET /notifications/stream, which never ends.
+"""
+
+import argparse
+import asyncio
+import csv
+import io
+import json
+import os
+import platform
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+
+from backend.benchmarks.bench_async import REPO_ROOT
+from backend.benchmarks.generate_data import PASSWORD, app_ids_of, create_database, email_of
+from backend.models import APPLICATION_STATUSES
+from backend.passwords import BCRYPT_ROUNDS
+from backend.runs import percentile
+
+
+def _application(i: int) -> dict:
+    applied = datetime(2026, 1, 1) + timedelta(hours=i)
+    return {
+        "company_name": f"Suite {i}", "role_title": "Engineer", "city": "Remote", "country": "India",
+        "applied_date": applied.isoformat(), "followup_date": (applied + timedelta(days=7)).isoformat(),
+    }
+
+
+def _csv(rows: List[dict]) -> bytes:
+    out = io.StringIO()
+    writer = csv.DictWriter(out, fieldnames=list(rows[0]))
+    writer.writeheader()
+    writer.writerows(rows)
+    return out.getvalue().encode()
+
+
+@dataclass(frozen=True)
+class Scenario:
+    method: str
+    # {app_id} is one of the requesting user's applications
+    path: str
+    label: str = ""
+    # Request number -> JSON body, or raw content sent as text/csv
+    json: Optional[Callable[[int], object]] = None
+    content: Optional[Callable[[int], bytes]] = None
+    # Fraction of --requests, for the expensive ones
+    share: float = 1.0
+    # Every request needs an application (or a user) nothing else uses
+    consumes: Optional[str] = None
+    # Sent by the admin, user 1
+    admin: bool = False
+
+    @property
+    def name(self) -> str:
+        name = f"{self.method} {self.path}"
+        return f"{name} ({self.label})" if self.label else name
+
+
+SCENARIOS = [
+    Scenario("GET", "/me"),
+    Scenario("GET", "/apps"),
+    Scenario("GET", "/apps?status=pending"),
+    Scenario("GET", "/apps?sort=applied_date&limit=200"),
+    Scenario("GET", "/apps/search?q=engineer"),
+    Scenario("GET", "/apps/search?q=data%20eng"),
+    Scenario("GET", "/apps/export?format=csv"),
+    Scenario("GET", "/apps/export?format=ndjson"),
+    Scenario("GET", "/apps/{app_id}/timeline"),
+    Scenario("GET", "/timeline"),
+    Scenario("GET", "/timeline?event_type=status-changed"),
+    Scenario("GET", "/metrics"),
+    Scenario("GET", "/notifications"),
+    Scenario("GET", "/notifications/unread-count"),
+    Scenario("GET", "/notifications/history"),
+    Scenario("GET", "/cron/last-run"),
+    Scenario("GET", "/cron/stats"),
+    Scenario("GET", "/internal/metrics"),
+    Scenario("GET", "/admin/apps?limit=1000", admin=True),
+    Scenario("GET", "/admin/apps?status=accepted&limit=1000", admin=True),
+    Scenario("GET", "/admin/users?limit=1000", admin=True),
+    Scenario("POST", "/login", json=lambda i: {"email": email_of(1), "password": PASSWORD}, share=0.05),
+    Scenario("POST", "/signup", share=0.05,
+             json=lambda i: {"email": f"suite{i}@example.com", "password": PASSWORD, "name": "Suite User"}),
+    Scenario("PUT", "/me", json=lambda i: {"name": "Renamed User"}),
+    Scenario("POST", "/apps", json=_application),
+    Scenario("PUT", "/apps/{app_id}", "notes", json=lambda i: {"notes": f"note {i}"}),
+    Scenario("PUT", "/apps/{app_id}", "status",
+             json=lambda i: {"status": APPLICATION_STATUSES[i % len(APPLICATION_STATUSES)]}),
+    Scenario("POST", "/apps/bulk", "50 rows", json=lambda i: [_application(i * 50 + n) for n in range(50)], share=0.25),
+    Scenario("POST", "/apps/import", "50 rows", content=lambda i: _csv([_application(i * 50 + n) for n in range(50)]),
+             share=0.25),
+    Scenario("POST", "/notifications/mark-read"),
+    Scenario("POST", "/automation/run-now"),
+    Scenario("DELETE", "/apps/{app_id}", consumes="application"),
+    Scenario("DELETE", "/me", consumes="user", share=0.1),
+]
+
+
+@dataclass
+class Stats:
+    requests: int
+    errors: int
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    mean_ms: float
+    throughput_rps: float
+
+
+def summarize(latencies: List[float], errors: int, wall_seconds: float) -> Stats:
+    ordered = sorted(latencies)
+    return Stats(
+        requests=len(ordered),
+        errors=errors,
+        p50_ms=round(percentile(ordered, 0.50) * 1000, 3),
+        p95_ms=round(percentile(ordered, 0.95) * 1000, 3),
+        p99_ms=round(percentile(ordered, 0.99) * 1000, 3),
+        mean_ms=round(sum(ordered) / len(ordered) * 1000, 3),
+        throughput_rps=round(len(ordered) / wall_seconds, 1),
+    )
+
+
+# --- Child: one size, in process ---
+
+class Requests:
+    """Builds the n-th request of a scenario: who sends it, where, with what."""
+
+    def __init__(self, users: int, apps_per_user: int, sample_users: int, secret_key: str, algorithm: str):
+        self.users = users
+        self.apps_per_user = apps_per_user
+        self.secret_key = secret_key
+        self.algorithm = algorithm
+        # Spread over the lower half of the ids; users are deleted from the top
+        step = max(1, users // 2 // sample_users)
+        self.sample = list(range(1, users // 2 + 1, step))[:sample_users] or [1]
+        self._tokens: Dict[int, str] = {}
+
+    def token(self, user_id: int) -> str:
+        """A token like POST /login's, without paying for bcrypt on every user."""
+        if user_id not in self._tokens:
+            import jwt
+
+            payload = {
+                "sub": user_id, "email": email_of(user_id), "name": "Suite User",
+                "exp": datetime.utcnow() + timedelta(hours=12),
+            }
+            self._tokens[user_id] = jwt.encode(payload, self.secret_key, algorithm=self.algorithm)
+        return self._tokens[user_id]
+
+    def build(self, scenario: Scenario, i: int) -> dict:
+        if scenario.admin:
+            user_id, app_id = 1, app_ids_of(1, self.apps_per_user)[0]
+        elif scenario.consumes == "user":
+            user_id = self.users - i
+            app_id = app_ids_of(user_id, self.apps_per_user)[0]
+        else:
+            user_id = self.sample[i % len(self.sample)]
+            apps = app_ids_of(user_id, self.apps_per_user)
+            # Deletions take each user's applications from the last one down
+            app_id = apps[-1 - i // len(self.sample)] if scenario.consumes == "application" else apps[0]
+        request = {
+            "method": scenario.method,
+            "url": scenario.path.format(app_id=app_id),
+            "headers": {"Authorization": f"Bearer {self.token(user_id)}"},
+        }
+        if scenario.json is not None:
+            request["json"] = scenario.json(i)
+        if scenario.content is not None:
+            request["content"] = scenario.content(i)
+            request["headers"]["Content-Type"] = "text/csv"
+        return request
+
+
+def _ok(status_code: int) -> bool:
+    return 200 <= status_code < 300 or status_code == 304
+
+
+async def drive(client, requests: Requests, scenario: Scenario, total: int, warmup: int, concurrency: int) -> Stats:
+    latencies, errors = [], 0
+    for i in range(warmup):
+        await client.request(**requests.build(scenario, i))
+
+    next_request = warmup
+
+    async def worker():
+        nonlocal next_request, errors
+        while next_request < warmup + total:
+            request = requests.build(scenario, next_request)
+            next_request += 1
+            start = time.perf_counter()
+            response = await client.request(**request)
+            latencies.append(time.perf_counter() - start)
+            if not _ok(response.status_code):
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, errors, time.perf_counter() - start)
+
+
+def _print_row(name: str, stats: Stats):
+    errors = f"  {stats.errors} errors" if stats.errors else ""
+    print(f"  {name:<48} {stats.requests:>6}  {stats.p50_ms:>9.2f}  {stats.p95_ms:>9.2f}  {stats.p99_ms:>9.2f}  "
+          f"{stats.throughput_rps:>9.1f}{errors}", flush=True)
+
+
+def bench_cron(run_cron_updates, passes: int) -> Dict[str, dict]:
+    start = time.perf_counter()
+    moved = sum(run_cron_updates().values())
+    first = time.perf_counter() - start
+    results = {"run_cron_updates (first pass)": {**asdict(summarize([first], 0, first)), "moved": moved}}
+
+    steady = []
+    for _ in range(passes):
+        start = time.perf_counter()
+        run_cron_updates()
+        steady.append(time.perf_counter() - start)
+    results["run_cron_updates (steady)"] = asdict(summarize(steady, 0, sum(steady)))
+    for name, stats in results.items():
+        _print_row(name, Stats(**{key: value for key, value in stats.items() if key != "moved"}))
+    return results
+
+
+async def run_child(config: dict) -> Dict[str, dict]:
+    import logging
+
+    import httpx
+
+    from backend import main
+
+    # backend.main logs every request and pass at INFO
+    logging.getLogger().setLevel(logging.WARNING)
+
+    results = bench_cron(main.run_cron_updates, config["cron_passes"])
+    requests = Requests(config["users"], config["apps_per_user"], config["sample_users"],
+                        main.SECRET_KEY, main.ALGORITHM)
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://suite", timeout=None) as client:
+        for scenario in SCENARIOS:
+            total = max(1, round(config["requests"] * scenario.share))
+            warmup = min(config["warmup"], total)
+            stats = await drive(client, requests, scenario, total, warmup, config["concurrency"])
+            _print_row(scenario.name, stats)
+            results[scenario.name] = asdict(stats)
+    return results
+
+
+# --- Parent: sizes, baseline ---
+
+def dataset(data_dir: str, users: int, apps_per_user: int, seed: int) -> Tuple[str, Optional[float]]:
+    """Path of the generated database, and how long it took to make (None if reused)."""
+    path = os.path.join(data_dir, f"data-{users}x{apps_per_user}-seed{seed}.db")
+    if os.path.exists(path):
+        return path, None
+    counts = create_database(f"sqlite:///{path}", users, apps_per_user, seed=seed)
+    return path, round(counts.seconds, 2)
+
+
+def run_size(rows: int, args, data_dir: str) -> dict:
+    users = max(1, rows // args.apps_per_user)
+    path, generate_seconds = dataset(data_dir, users, args.apps_per_user, args.seed)
+    made = f"generated in {generate_seconds}s" if generate_seconds is not None else f"reusing {path}"
+    print(f"\n{users * args.apps_per_user} applications, {users} users ({made})")
+    print(f"  {'scenario':<48} {'n':>6}  {'p50 ms':>9}  {'p95 ms':>9}  {'p99 ms':>9}  {'req/s':>9}", flush=True)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database = os.path.join(tmp, "apptrackr.db")
+        shutil.copy(path, database)
+        output = os.path.join(tmp, "results.json")
+        config = {
+            "users": users, "apps_per_user": args.apps_per_user, "sample_users": args.sample_users,
+            "requests": args.requests, "warmup": args.warmup, "concurrency": args.concurrency,
+            "cron_passes": args.cron_passes, "output": output,
+        }
+        env = dict(os.environ, DATABASE_URL=f"sqlite:///{database}", PYTHONPATH=REPO_ROOT, ADMIN_USER_IDS="1")
+        subprocess.run(
+            [sys.executable, "-m", "backend.benchmarks.suite", "--child", json.dumps(config)],
+            cwd=tmp, env=env, check=True,
+        )
+        with open(output) as f:
+            scenarios = json.load(f)
+    return {"users": users, "applications": users * args.apps_per_user,
+            "generate_seconds": generate_seconds, "scenarios": scenarios}
+
+
+def metadata(args) -> dict:
+    return {
+        "created_at": datetime.utcnow().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "db_mode": os.getenv("DB_MODE", "sync"),
+        "bcrypt_rounds": BCRYPT_ROUNDS,
+        "options": {
+            "apps_per_user": args.apps_per_user, "requests": args.requests, "warmup": args.warmup,
+            "concurrency": args.concurrency, "sample_users": args.sample_users, "seed": args.seed,
+        },
+    }
+
+
+def compare(current: dict, baseline: dict, tolerance: float, min_delta_ms: float) -> List[str]:
+    """Print p50 / p95 against the baseline for every size and scenario both have; returns the regressions."""
+    regressions = []
+    for size, result in current["results"].items():
+        base = baseline["results"].get(size)
+        if base is None:
+            continue
+        print(f"\n{result['applications']} applications vs baseline of {baseline['meta']['created_at']}")
+        print(f"  {'scenario':<48} {'p50 ms':>19}  {'p95 ms':>19}  {'p95 change':>10}")
+        for name, stats in result["scenarios"].items():
+            old = base["scenarios"].get(name)
+            if old is None:
+                continue
+            change = (stats["p95_ms"] - old["p95_ms"]) / old["p95_ms"] if old["p95_ms"] else 0.0
+            regressed = change > tolerance and stats["p95_ms"] - old["p95_ms"] >= min_delta_ms
+            if regressed:
+                regressions.append(f"{size} rows: {name}")
+            print(f"  {name:<48} {old['p50_ms']:>8.2f} -> {stats['p50_ms']:>8.2f}  "
+                  f"{old['p95_ms']:>8.2f} -> {stats['p95_ms']:>8.2f}  {change * 100:>+9.1f}%"
+                  f"{'  REGRESSION' if regressed else ''}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[10000, 100000, 1000000],
+                        help="applications in the database, one run per size")
+    parser.add_argument("--apps-per-user", type=int, default=100)
+    parser.add_argument("--requests", type=int, default=200, help="measured requests per scenario")
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--sample-users", type=int, default=50)
+    parser.add_argument("--cron-passes", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--data-dir", help="keep generated databases here and reuse them")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="compare with the results of an earlier run")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="p95 slowdown that counts as a regression")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0, help="and the least one, in milliseconds")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        config = json.loads(args.child)
+        results = asyncio.run(run_child(config))
+        with open(config["output"], "w") as f:
+            json.dump(results, f)
+        return 0
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    report = {"meta": metadata(args), "results": {}}
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = args.data_dir or tmp
+        os.makedirs(data_dir, exist_ok=True)
+        for rows in args.rows:
+            report["results"][str(rows)] = run_size(rows, args, data_dir)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {args.output}")
+    if baseline is not None:
+        regressions = compare(report, baseline, args.tolerance, args.min_delta_ms)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s):\n  " + "\n  ".join(regressions))
+            return 1
+        print("\nNo regressions.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,205 @@
+"""
+Per-user cache of the dashboard's read endpoints.
+
+The frontend polls GET /apps, /metrics, /notifications and
+/apps/{id}/timeline every 30 seconds with the same parameters, and what
+they return only changes when the user or the automation writes.
+`read_cache` keeps each result under (user, data version, path and query
+string) for READ_CACHE_TTL seconds, at most READ_CACHE_SIZE entries, least
+recently used evicted first.
+
+The data version is the user's `userdataversion` counter (backend/etags.py),
+bumped by triggers in the transaction of every write to their
+applications, notifications or timeline, whichever worker, script or
+automation pass makes it. Each request reads it first (one primary-key
+lookup, which also answers If-None-Match) and only then looks the result up,
+so an entry is never served once the data it was built from has changed,
+and several workers with their own MemoryCache stay exact. A hit costs that
+one lookup instead of the endpoint's queries.
+
+Write paths also call invalidate(user_id) once their transaction has
+committed (the application and notification endpoints, imports, account
+deletion, and the automation for each chunk of users it moved). Entries of
+an old version can no longer be hit; this only frees their room at once
+instead of leaving them to age out.
+
+Entries live in a CacheBackend. MemoryCache keeps them in the worker
+process; configure() a backend over a shared store to share hits between
+workers. Entries must then pickle (endpoint results: dicts, lists and
+SQLAlchemy rows). READ_CACHE_SIZE=0 turns the cache off.
+
+Hits, misses, evictions and invalidations are counted on /internal/metrics
+(read_cache_*_total).
+"""
+
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, NamedTuple, Optional, Set
+
+from fastapi import Request, Response
+from prometheus_client import Counter
+
+from backend.db import run_db
+from backend.etags import check_etag, data_version, make_etag
+
+READ_CACHE_SIZE = int(os.getenv("READ_CACHE_SIZE", "10000"))
+READ_CACHE_TTL = float(os.getenv("READ_CACHE_TTL", "60"))
+
+HITS = Counter("read_cache_hits_total", "Reads answered from the read cache.", ["route"])
+MISSES = Counter("read_cache_misses_total", "Reads that went to the database and filled the read cache.", ["route"])
+EVICTIONS = Counter(
+    "read_cache_evictions_total", "Read cache entries dropped before invalidation, by reason.", ["reason"],
+)
+INVALIDATIONS = Counter("read_cache_invalidations_total", "Per-user read cache invalidations.")
+
+
+class CacheKey(NamedTuple):
+    user_id: int
+    # The user's userdataversion when the entry was read
+    version: int
+    # Path and query string of the request
+    shape: str
+
+
+class CacheBackend(ABC):
+    """Where cached reads are kept. Subclass it to share the cache between workers."""
+
+    @abstractmethod
+    def get(self, key: CacheKey) -> Optional[object]:
+        """The value stored under `key`, or None if there is none or it has expired."""
+
+    @abstractmethod
+    def set(self, key: CacheKey, value: object, ttl: float):
+        """Store `value` under `key` for `ttl` seconds."""
+
+    @abstractmethod
+    def invalidate(self, user_id: int):
+        """Drop the user's entries. Optional for correctness: stale ones are never hit."""
+
+    @abstractmethod
+    def clear(self):
+        """Drop every entry."""
+
+    @abstractmethod
+    def __len__(self) -> int:
+        """Entries currently stored."""
+
+
+class MemoryCache(CacheBackend):
+    """A bounded LRU with a TTL per entry, in this process."""
+
+    def __init__(self, max_entries: int = READ_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[CacheKey, tuple]" = OrderedDict()
+        self._keys_by_user: Dict[int, Set[CacheKey]] = {}
+        self._lock = threading.Lock()
+
+    def _drop(self, key: CacheKey):
+        del self._entries[key]
+        keys = self._keys_by_user[key.user_id]
+        keys.discard(key)
+        if not keys:
+            del self._keys_by_user[key.user_id]
+
+    def get(self, key: CacheKey) -> Optional[object]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                self._drop(key)
+                EVICTIONS.labels("expired").inc()
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: CacheKey, value: object, ttl: float):
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._keys_by_user.setdefault(key.user_id, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+                EVICTIONS.labels("capacity").inc()
+
+    def invalidate(self, user_id: int):
+        with self._lock:
+            for key in self._keys_by_user.pop(user_id, ()):
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_user.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class ReadCache:
+    def __init__(self, backend: Optional[CacheBackend] = None, ttl: float = READ_CACHE_TTL):
+        self.backend = backend
+        self.ttl = ttl
+
+    def configure(self, backend: Optional[CacheBackend], ttl: Optional[float] = None):
+        """Replace the backend (None turns the cache off)."""
+        self.backend = backend
+        if ttl is not None:
+            self.ttl = ttl
+
+    async def fetch(
+        self, request: Request, response: Response, user_id: int, load: Callable, etag: bool = True,
+    ):
+        """
+        run_db(load) for this user and request, from the cache when it holds
+        the result for the user's current data version. With `etag`, answers
+        If-None-Match first like backend.etags.conditional_get.
+        """
+        user_id = int(user_id)
+        backend = self.backend
+        route = getattr(request.scope.get("route"), "path", request.url.path)
+
+        def read(session):
+            if backend is None and not etag:
+                return load(session)
+            # The version is read before the data, so an entry is never older than its key
+            version = data_version(session, user_id)
+            if etag:
+                not_modified = check_etag(request, response, make_etag(request, user_id, version))
+                if not_modified:
+                    return not_modified
+            if backend is None:
+                return load(session)
+
+            key = CacheKey(user_id, version, f"{request.url.path}?{request.url.query}")
+            content = backend.get(key)
+            if content is not None:
+                HITS.labels(route).inc()
+                return content
+            MISSES.labels(route).inc()
+            content = load(session)
+            backend.set(key, content, self.ttl)
+            return content
+
+        return await run_db(read)
+
+    def invalidate(self, user_id: int):
+        """Drop the user's cached reads; call after their write has committed."""
+        if self.backend is not None:
+            self.backend.invalidate(int(user_id))
+            INVALIDATIONS.inc()
+
+    def invalidate_many(self, user_ids: Iterable[int]):
+        for user_id in user_ids:
+            self.invalidate(user_id)
+
+    def __len__(self) -> int:
+        return len(self.backend) if self.backend is not None else 0
+
+
+read_cache = ReadCache(MemoryCache() if READ_CACHE_SIZE > 0 else None)
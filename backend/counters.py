@@ -0,0 +1,215 @@
+"""
+Per-user counters maintained by SQLite triggers.
+
+`applicationstatuscount` holds one row per (user_id, status) and backs
+GET /metrics; `unreadnotificationcount` holds one row per user and backs
+GET /notifications/unread-count. Triggers on the application and
+appnotification tables keep them current, so every insert, update and delete
+(API endpoints, bulk automation statements, anything else) adjusts the
+counters inside the same transaction as the write itself.
+
+For status counts a GROUP BY over the application table is kept as the
+fallback and as the consistency checker:
+    python -m backend.counters          # report drift
+    python -m backend.counters --fix    # report and rebuild drifting users
+"""
+
+import sys
+from typing import Dict, Optional
+
+from sqlalchemy import delete, func
+from sqlmodel import Session, select
+
+from backend.models import APPLICATION_STATUSES, Application, ApplicationStatusCount, UnreadNotificationCount
+
+_UPSERT = """
+    INSERT INTO applicationstatuscount (user_id, status, count) VALUES ({user}, {status}, 1)
+    ON CONFLICT(user_id, status) DO UPDATE SET count = count + 1;
+"""
+_DECREMENT = """
+    UPDATE applicationstatuscount SET count = count - 1
+    WHERE user_id = {user} AND status = {status};
+"""
+
+TRIGGERS = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_application_status_count_insert
+    AFTER INSERT ON application
+    BEGIN
+        {_UPSERT.format(user="NEW.user_id", status="NEW.status")}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_application_status_count_delete
+    AFTER DELETE ON application
+    BEGIN
+        {_DECREMENT.format(user="OLD.user_id", status="OLD.status")}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_application_status_count_update
+    AFTER UPDATE OF status, user_id ON application
+    WHEN OLD.status IS NOT NEW.status OR OLD.user_id IS NOT NEW.user_id
+    BEGIN
+        {_DECREMENT.format(user="OLD.user_id", status="OLD.status")}
+        {_UPSERT.format(user="NEW.user_id", status="NEW.status")}
+    END
+    """,
+]
+
+
+def install(conn):
+    """Create the counter triggers and rebuild every counter from the application table."""
+    for ddl in TRIGGERS:
+        conn.exec_driver_sql(ddl)
+    conn.exec_driver_sql("DELETE FROM applicationstatuscount")
+    conn.exec_driver_sql(
+        "INSERT INTO applicationstatuscount (user_id, status, count) "
+        "SELECT user_id, status, COUNT(*) FROM application GROUP BY user_id, status"
+    )
+
+
+_UNREAD_DELTA = """
+    INSERT INTO unreadnotificationcount (user_id, unread) VALUES ({user}, {delta})
+    ON CONFLICT(user_id) DO UPDATE SET unread = unread + {delta};
+"""
+
+UNREAD_TRIGGERS = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_appnotification_unread_insert
+    AFTER INSERT ON appnotification
+    WHEN NOT NEW.read
+    BEGIN
+        {_UNREAD_DELTA.format(user="NEW.user_id", delta=1)}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_appnotification_unread_delete
+    AFTER DELETE ON appnotification
+    WHEN NOT OLD.read
+    BEGIN
+        {_UNREAD_DELTA.format(user="OLD.user_id", delta=-1)}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_appnotification_unread_update
+    AFTER UPDATE OF read, user_id ON appnotification
+    WHEN OLD.read IS NOT NEW.read OR OLD.user_id IS NOT NEW.user_id
+    BEGIN
+        INSERT INTO unreadnotificationcount (user_id, unread)
+        SELECT OLD.user_id, -1 WHERE NOT OLD.read
+        ON CONFLICT(user_id) DO UPDATE SET unread = unread - 1;
+        INSERT INTO unreadnotificationcount (user_id, unread)
+        SELECT NEW.user_id, 1 WHERE NOT NEW.read
+        ON CONFLICT(user_id) DO UPDATE SET unread = unread + 1;
+    END
+    """,
+]
+
+
+def install_unread(conn):
+    """Create the unread-notification triggers and rebuild the counters."""
+    for ddl in UNREAD_TRIGGERS:
+        conn.exec_driver_sql(ddl)
+    conn.exec_driver_sql("DELETE FROM unreadnotificationcount")
+    conn.exec_driver_sql(
+        "INSERT INTO unreadnotificationcount (user_id, unread) "
+        "SELECT user_id, COUNT(*) FROM appnotification WHERE NOT read GROUP BY user_id"
+    )
+
+
+def unread_count(session: Session, user_id: int) -> int:
+    unread = session.exec(
+        select(UnreadNotificationCount.unread).where(UnreadNotificationCount.user_id == user_id)
+    ).first()
+    return unread or 0
+
+
+def _with_known_statuses(counts: Dict[str, int]) -> Dict[str, int]:
+    by_status = {status: 0 for status in APPLICATION_STATUSES}
+    by_status.update({status: count for status, count in counts.items() if count})
+    return by_status
+
+
+def counted_statuses(session: Session, user_id: int) -> Dict[str, int]:
+    """Status counts from the maintained counters: one primary-key range read."""
+    rows = session.exec(
+        select(ApplicationStatusCount.status, ApplicationStatusCount.count)
+        .where(ApplicationStatusCount.user_id == user_id)
+    ).all()
+    return dict(rows)
+
+
+def grouped_statuses(session: Session, user_id: int) -> Dict[str, int]:
+    """Status counts straight from the application table (index-only GROUP BY)."""
+    rows = session.exec(
+        select(Application.status, func.count())
+        .where(Application.user_id == user_id)
+        .group_by(Application.status)
+    ).all()
+    return dict(rows)
+
+
+def status_counts(session: Session, user_id: int) -> Dict[str, int]:
+    """
+    Counts for every known status (zero-filled) plus any unexpected status.
+
+    Users without counter rows, e.g. on a database whose counters were never
+    built, fall back to the GROUP BY query.
+    """
+    counts = counted_statuses(session, user_id)
+    if not counts:
+        counts = grouped_statuses(session, user_id)
+    return _with_known_statuses(counts)
+
+
+def find_drift(session: Session, user_id: Optional[int] = None) -> Dict[int, Dict[str, tuple]]:
+    """
+    Compare counters with the GROUP BY truth.
+
+    Returns {user_id: {status: (counter, actual)}} for every mismatch.
+    """
+    counter_query = select(ApplicationStatusCount.user_id, ApplicationStatusCount.status, ApplicationStatusCount.count)
+    actual_query = select(Application.user_id, Application.status, func.count()).group_by(Application.user_id, Application.status)
+    if user_id is not None:
+        counter_query = counter_query.where(ApplicationStatusCount.user_id == user_id)
+        actual_query = actual_query.where(Application.user_id == user_id)
+
+    counters = {(uid, status): count for uid, status, count in session.exec(counter_query)}
+    actual = {(uid, status): count for uid, status, count in session.exec(actual_query)}
+
+    drift = {}
+    for key in counters.keys() | actual.keys():
+        have, want = counters.get(key, 0), actual.get(key, 0)
+        if have != want:
+            uid, status = key
+            drift.setdefault(uid, {})[status] = (have, want)
+    return drift
+
+
+def rebuild(session: Session, user_id: int):
+    """Replace one user's counters with the GROUP BY result. The caller commits."""
+    session.exec(delete(ApplicationStatusCount).where(ApplicationStatusCount.user_id == user_id))
+    for status, count in grouped_statuses(session, user_id).items():
+        session.add(ApplicationStatusCount(user_id=user_id, status=status, count=count))
+
+
+def main(argv=None):
+    from backend.db import engine
+
+    argv = sys.argv[1:] if argv is None else argv
+    fix = "--fix" in argv
+    with Session(engine) as session:
+        drift = find_drift(session)
+        for uid, statuses in sorted(drift.items()):
+            print(f"user {uid}: " + ", ".join(f"{s} counter={have} actual={want}" for s, (have, want) in statuses.items()))
+            if fix:
+                rebuild(session, uid)
+        session.commit()
+    if not drift:
+        print("Counters are consistent.")
+    return 1 if drift and not fix else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
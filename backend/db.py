@@ -1,10 +1,132 @@
-from sqlmodel import SQLModel, create_engine
+import os
+from typing import Optional
 
-# SQLite URL (can also use environment variable for config)
-DATABASE_URL = "sqlite:///apptrackr.db"
+from dotenv import load_dotenv
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlmodel import Session, SQLModel, create_engine
 
-engine = create_engine(DATABASE_URL, echo=False)
+# Settings below may come from a .env file
+load_dotenv()
+
+# SQLite URL, relative to the working directory unless overridden
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///apptrackr.db")
+
+# SQLite tuning applied to every new connection. WAL lets the API's readers
+# keep going while the automation job writes; busy_timeout makes writers
+# queue for the lock instead of failing with "database is locked".
+SQLITE_PRAGMAS = {
+    "journal_mode": os.getenv("SQLITE_JOURNAL_MODE", "WAL"),
+    "synchronous": os.getenv("SQLITE_SYNCHRONOUS", "NORMAL"),
+    "busy_timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000")),
+    "mmap_size": int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024))),
+    "cache_size": int(os.getenv("SQLITE_CACHE_SIZE", "-65536")),  # negative = KiB, i.e. 64 MiB
+    "temp_store": os.getenv("SQLITE_TEMP_STORE", "MEMORY"),
+}
+
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+
+
+def _is_sqlite_file(url) -> bool:
+    return url.get_backend_name() == "sqlite" and url.database not in (None, "", ":memory:")
+
+
+def _apply_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    for name, value in SQLITE_PRAGMAS.items():
+        cursor.execute(f"PRAGMA {name}={value}")
+    cursor.close()
+
+
+def _engine_options(url, overrides):
+    options = {"echo": False}
+    if _is_sqlite_file(url):
+        options.update(
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
+            connect_args={"check_same_thread": False},
+        )
+    options.update(overrides)
+    return options
+
+
+def make_engine(url: Optional[str] = None, **overrides):
+    """
+    Build the blocking engine for `url` (default: DATABASE_URL).
+
+    SQLite file databases get the PRAGMA profile above on every connection
+    and an explicitly sized connection pool; keyword overrides win.
+    """
+    url = make_url(url or DATABASE_URL)
+    engine = create_engine(url, **_engine_options(url, overrides))
+    if url.get_backend_name() == "sqlite":
+        event.listen(engine, "connect", _apply_pragmas)
+    return engine
+
+
+def make_async_engine(url: Optional[str] = None, **overrides):
+    """The aiosqlite counterpart of make_engine, for DB_MODE=async."""
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    url = make_url(url or DATABASE_URL)
+    if url.drivername == "sqlite":
+        url = url.set(drivername="sqlite+aiosqlite")
+    options = _engine_options(url, overrides)
+    options.pop("connect_args", None)
+    engine = create_async_engine(url, **options)
+    if url.get_backend_name() == "sqlite":
+        event.listen(engine.sync_engine, "connect", _apply_pragmas)
+    return engine
+
+
+engine = make_engine()
+
+# "sync": endpoints run their queries on the threadpool with a blocking Session.
+# "async": queries go through an aiosqlite-backed AsyncSession on the event loop.
+DB_MODE = os.getenv("DB_MODE", "sync")
+
+async_engine = None
+if DB_MODE == "async":
+    async_engine = make_async_engine()
+elif DB_MODE != "sync":
+    raise ValueError(f"DB_MODE must be 'sync' or 'async', got {DB_MODE!r}")
 
 def create_db_and_tables():
-    SQLModel.metadata.create_all(engine)
-    
\ No newline at end of file
+    from backend.migrations import upgrade, write_transaction
+
+    # Under the write lock, so workers starting together on a new database
+    # don't both try to create the same table
+    with write_transaction(engine) as conn:
+        SQLModel.metadata.create_all(conn)
+    # Bring existing databases up to date (indexes, columns, triggers)
+    upgrade(engine)
+
+def _run_with_session(fn, *args):
+    with Session(engine) as session:
+        return fn(session, *args)
+
+async def run_db(fn, *args):
+    """
+    Run fn(session, *args) and return its result, without blocking the event loop.
+
+    In sync mode fn gets a regular Session on a threadpool worker. In async mode
+    it runs through AsyncSession.run_sync, so the request awaits aiosqlite
+    instead of holding one of the threadpool's limited slots while SQLite works.
+    The same fn serves both modes.
+    """
+    if async_engine is not None:
+        from sqlmodel.ext.asyncio.session import AsyncSession
+
+        async with AsyncSession(async_engine) as session:
+            return await session.run_sync(fn, *args)
+    return await run_in_threadpool(_run_with_session, fn, *args)
+
+async def dispose_engines():
+    """Close pooled connections on shutdown (aiosqlite keeps one thread per connection)."""
+    if async_engine is not None:
+        await async_engine.dispose()
+    engine.dispose()
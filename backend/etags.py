@@ -0,0 +1,96 @@
+"""
+Conditional GET support for the per-user read endpoints.
+
+`userdataversion` holds one counter per user. Triggers on application,
+appnotification and applicationtimeline bump it inside the writing
+transaction, so the counter changes whenever anything those endpoints return
+could have changed. ETags are derived from it: answering If-None-Match costs
+one primary-key lookup and never touches the application tables.
+"""
+
+import hashlib
+from typing import Optional
+
+from fastapi import Request, Response
+from sqlmodel import Session, select
+
+from backend.models import UserDataVersion
+
+_BUMP = """
+    INSERT INTO userdataversion (user_id, version) VALUES ({user}, 1)
+    ON CONFLICT(user_id) DO UPDATE SET version = version + 1;
+"""
+
+VERSIONED_TABLES = ["application", "appnotification", "applicationtimeline"]
+
+
+def _triggers(table):
+    return [
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_{table}_data_version_insert
+        AFTER INSERT ON {table}
+        BEGIN
+            {_BUMP.format(user="NEW.user_id")}
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_{table}_data_version_update
+        AFTER UPDATE ON {table}
+        BEGIN
+            {_BUMP.format(user="NEW.user_id")}
+            {_BUMP.format(user="OLD.user_id")}
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_{table}_data_version_delete
+        AFTER DELETE ON {table}
+        BEGIN
+            {_BUMP.format(user="OLD.user_id")}
+        END
+        """,
+    ]
+
+
+def install(conn):
+    """Create the version-bumping triggers on every versioned table."""
+    for table in VERSIONED_TABLES:
+        for ddl in _triggers(table):
+            conn.exec_driver_sql(ddl)
+
+
+def data_version(session: Session, user_id: int) -> int:
+    version = session.exec(select(UserDataVersion.version).where(UserDataVersion.user_id == user_id)).first()
+    return version or 0
+
+
+def make_etag(request: Request, user_id: int, version: int) -> str:
+    # The same data version renders differently per path and query string
+    shape = f"{user_id}:{request.url.path}?{request.url.query}"
+    digest = hashlib.blake2b(shape.encode(), digest_size=8).hexdigest()
+    return f'W/"{version}-{digest}"'
+
+
+def _matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+def conditional_get(session: Session, request: Request, response: Response, user_id: int) -> Optional[Response]:
+    """
+    Return a 304 response if the client's If-None-Match is still current.
+
+    Otherwise set ETag on `response` and return None so the endpoint can build
+    the body as usual.
+    """
+    return check_etag(request, response, make_etag(request, user_id, data_version(session, user_id)))
+
+
+def check_etag(request: Request, response: Response, etag: str) -> Optional[Response]:
+    """A 304 response if If-None-Match holds `etag`, else None with the ETag set on `response`."""
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if _matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
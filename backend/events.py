@@ -0,0 +1,90 @@
+"""
+In-process pub/sub for pushing new notifications to connected clients.
+
+Each open GET /notifications/stream connection subscribes for its user and
+gets a bounded asyncio queue. Writers publish the notification rows they just
+committed, from any thread (the automation runs on the scheduler's thread),
+and the hub hands them to the subscribers' event loops, so an idle connection
+costs no database work beyond a primary-key version check per keepalive.
+"""
+
+import asyncio
+import threading
+from typing import Dict, Iterable, Set
+
+# Events kept per connection before the oldest are dropped. A client that
+# falls this far behind catches up through Last-Event-ID on reconnect.
+SUBSCRIBER_QUEUE_SIZE = 100
+
+
+class Subscription:
+    def __init__(self, user_id: int, loop: asyncio.AbstractEventLoop):
+        self.user_id = user_id
+        self.loop = loop
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+
+    def _offer(self, event: dict):
+        # Runs on the subscriber's loop
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(event)
+
+    def offer(self, event: dict):
+        try:
+            self.loop.call_soon_threadsafe(self._offer, event)
+        except RuntimeError:
+            # Loop already closed; the connection is going away
+            pass
+
+
+class NotificationHub:
+    def __init__(self):
+        self._subscribers: Dict[int, Set[Subscription]] = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, user_id: int) -> Subscription:
+        """Register the calling coroutine's connection. Must be called from its event loop."""
+        subscription = Subscription(user_id, asyncio.get_running_loop())
+        with self._lock:
+            self._subscribers.setdefault(user_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.user_id)
+            if subscribers:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.user_id]
+
+    def subscribed_users(self) -> Set[int]:
+        with self._lock:
+            return set(self._subscribers)
+
+    def connection_count(self) -> int:
+        with self._lock:
+            return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+    def publish(self, user_id: int, event: dict):
+        with self._lock:
+            subscribers = list(self._subscribers.get(user_id, ()))
+        for subscription in subscribers:
+            subscription.offer(event)
+
+    def publish_notifications(self, notifications: Iterable):
+        """Publish committed AppNotification rows to their users' connections."""
+        for notification in notifications:
+            self.publish(notification.user_id, notification_event(notification))
+
+
+def notification_event(notification) -> dict:
+    return {
+        "id": notification.id,
+        "app_id": notification.app_id,
+        "message": notification.message,
+        "created_at": notification.created_at.isoformat(),
+        "read": notification.read,
+    }
+
+
+hub = NotificationHub()
@@ -0,0 +1,196 @@
+"""
+Bulk creation of applications: POST /apps/bulk (JSON array) and
+POST /apps/import (CSV body, read as it streams in).
+
+Rows are validated one by one against the same schema as POST /apps. Valid
+rows are inserted IMPORT_BATCH_SIZE at a time, one transaction and one
+executemany per batch, instead of a commit and refresh per row. Invalid rows
+are reported by number and skipped, so one bad line does not abort the rest
+of the file.
+
+A CSV record may span lines inside a quoted field, so a line is held back
+while its quotes are unbalanced. A stray quote (an unquoted `5" monitor`
+cell) would hold back the rest of the file: past MAX_RECORD_BYTES the held
+record is reported as a bad row, its first line is dropped and reading
+resumes on the next one.
+"""
+
+import csv
+import os
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, AsyncIterable, AsyncIterator, Dict, List, Optional, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import insert
+
+from backend.cache import read_cache
+from backend.db import run_db
+from backend.models import Application
+
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "500"))
+# Largest JSON array POST /apps/bulk accepts; big files go through /apps/import
+BULK_MAX_ROWS = 1000
+# Per-row errors listed in the report; further failures are only counted
+MAX_REPORTED_ERRORS = 100
+# Longest CSV record (one row, quoted line breaks included) /apps/import reads
+MAX_RECORD_BYTES = int(os.getenv("IMPORT_MAX_RECORD_BYTES", str(64 * 1024)))
+
+# NOT NULL columns the request schema lets through as None (followup_date):
+# checked per row so they are reported instead of failing the whole batch
+REQUIRED_COLUMNS = [
+    column.name for column in Application.__table__.columns
+    if not column.nullable and column.default is None and not column.primary_key and column.name != "user_id"
+]
+
+
+@dataclass
+class ImportReport:
+    created: int = 0
+    failed: int = 0
+    errors: List[dict] = field(default_factory=list)
+
+    def reject(self, row: int, errors: List[dict]):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"row": row, "errors": errors})
+
+    def as_dict(self) -> dict:
+        return {"created": self.created, "failed": self.failed, "errors": self.errors}
+
+
+@dataclass
+class Unreadable:
+    """A record that could not be parsed, in place of its data: reported with these errors."""
+    errors: List[dict]
+
+
+def _validation_errors(exc: ValidationError) -> List[dict]:
+    return [
+        {"field": ".".join(str(part) for part in error["loc"]), "message": error["msg"]}
+        for error in exc.errors()
+    ]
+
+
+def insert_applications(session, user_id: int, rows: List[dict]) -> int:
+    """Insert validated rows for one user in a single transaction."""
+    now = datetime.utcnow()
+    session.exec(insert(Application), params=[{**row, "user_id": user_id, "updated_at": now} for row in rows])
+    session.commit()
+    read_cache.invalidate(user_id)
+    return len(rows)
+
+
+async def import_rows(records: AsyncIterable[Tuple[int, Any]], schema, user_id: int) -> ImportReport:
+    """
+    Validate (row number, data) pairs against `schema` and insert the valid
+    ones in batches. Batches already inserted stay inserted.
+    """
+    report = ImportReport()
+    batch: List[dict] = []
+    async for row, data in records:
+        if isinstance(data, Unreadable):
+            report.reject(row, data.errors)
+            continue
+        try:
+            item = schema.parse_obj(data)
+        except ValidationError as exc:
+            report.reject(row, _validation_errors(exc))
+            continue
+        values = item.dict()
+        missing = [name for name in REQUIRED_COLUMNS if values.get(name) is None]
+        if missing:
+            report.reject(row, [{"field": name, "message": "Field required"} for name in missing])
+            continue
+        batch.append(values)
+        if len(batch) >= IMPORT_BATCH_SIZE:
+            report.created += await run_db(insert_applications, user_id, batch)
+            batch = []
+    if batch:
+        report.created += await run_db(insert_applications, user_id, batch)
+    return report
+
+
+async def json_records(rows: List[Any]) -> AsyncIterator[Tuple[int, Any]]:
+    for row, data in enumerate(rows, start=1):
+        yield row, data
+
+
+async def _csv_lines(chunks: AsyncIterable[bytes]) -> AsyncIterator[Optional[str]]:
+    """
+    Complete CSV records from a byte stream, newline included. A line is held
+    back while the record has an odd number of quotes, i.e. ends inside a
+    quoted field; None stands for a record longer than MAX_RECORD_BYTES,
+    whose first line is skipped.
+
+    Quotes are counted once per byte as it arrives ('"' and newlines never
+    occur inside a multi-byte UTF-8 sequence), so reading stays linear
+    however long a record is held.
+    """
+    pending = bytearray()
+    start = 0  # where the current record begins in `pending`
+    scanned = 0  # bytes of it already counted into `quotes`
+    quotes = 0
+    skipping = False  # dropping the rest of an oversized record's first line
+    async for chunk in chunks:
+        del pending[:start]
+        scanned -= start
+        start = 0
+        pending += chunk
+        while True:
+            end = pending.find(b"\n", start if skipping else scanned)
+            if skipping:
+                if end == -1:
+                    start = scanned = len(pending)
+                    break
+                start = scanned = end + 1
+                skipping = False
+                continue
+            stop = len(pending) if end == -1 else end + 1
+            quotes += pending.count(b'"', scanned, stop)
+            scanned = stop
+            if scanned - start > MAX_RECORD_BYTES:
+                yield None
+                end = pending.find(b"\n", start)
+                skipping = end == -1
+                start = scanned = len(pending) if skipping else end + 1
+                quotes = 0
+            elif end != -1 and not quotes % 2:
+                yield pending[start:end + 1].decode("utf-8-sig")
+                start = end + 1
+                quotes = 0
+            elif end == -1:
+                break
+    rest = "" if skipping else pending[start:].decode("utf-8-sig")
+    if rest.strip():
+        yield rest
+
+
+async def csv_records(chunks: AsyncIterable[bytes]) -> AsyncIterator[Tuple[int, dict]]:
+    """
+    (row number, data) pairs from a CSV upload whose first line names the
+    columns. Empty cells are left out so optional fields take their defaults;
+    row numbers count the header as row 1, as spreadsheets do.
+    """
+    header = None
+    row = 1
+    async for line in _csv_lines(chunks):
+        if line is None:
+            errors = [{"field": "", "message": f"Row longer than {MAX_RECORD_BYTES} bytes (unbalanced quote?)"}]
+            if header is None:
+                yield row, Unreadable(errors)
+                return
+            row += 1
+            yield row, Unreadable(errors)
+            continue
+        values = next(csv.reader([line]), [])
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        row += 1
+        if not any(value.strip() for value in values):
+            continue
+        data: Dict[str, str] = {
+            name: value for name, value in zip(header, values) if name and value.strip() != ""
+        }
+        yield row, data
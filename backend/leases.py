@@ -0,0 +1,99 @@
+"""
+Leases on CronLog rows, for electing a single worker to run background jobs.
+
+`uvicorn --workers N` starts N copies of the app, each with its own
+scheduler. A lease is a CronLog row whose `lease_owner` and
+`lease_expires_at` say which worker may run the job and until when. Taking
+and renewing it is one conditional UPDATE, which SQLite applies atomically:
+it only matches when the lease is free, expired or already ours, so at most
+one worker holds it at any time. The holder renews it well before it expires;
+when the holder dies, the lease runs out and the next worker to try takes it.
+
+Expiry is compared against each worker's own clock. With SQLite all workers
+share a host, so they share that clock too.
+"""
+
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import DateTime, insert, literal, or_, update
+from sqlmodel import Session, select
+
+from backend.models import CronLog
+
+AUTOMATION_LEASE = "automation_leader"
+# How long a lease lasts without renewal, i.e. the longest takeover delay
+AUTOMATION_LEASE_SECONDS = int(os.getenv("AUTOMATION_LEASE_SECONDS", "30"))
+
+
+def worker_id() -> str:
+    """A name for this process that is unique across restarts and hosts."""
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+class Lease:
+    def __init__(self, engine, name: str = AUTOMATION_LEASE, ttl_seconds: int = AUTOMATION_LEASE_SECONDS,
+                 owner: Optional[str] = None):
+        self.engine = engine
+        self.name = name
+        self.ttl = timedelta(seconds=ttl_seconds)
+        self.owner = owner or worker_id()
+
+    def acquire(self, now: Optional[datetime] = None) -> bool:
+        """Take the lease, or extend it if already held. True if this worker holds it afterwards."""
+        now = now or datetime.utcnow()
+        expires_at = now + self.ttl
+        with Session(self.engine) as session:
+            result = session.exec(
+                update(CronLog)
+                .where(
+                    CronLog.job_name == self.name,
+                    or_(
+                        CronLog.lease_owner == self.owner,
+                        CronLog.lease_owner.is_(None),
+                        CronLog.lease_expires_at.is_(None),
+                        CronLog.lease_expires_at < now,
+                    ),
+                )
+                .values(lease_owner=self.owner, lease_expires_at=expires_at, last_run=now)
+            )
+            acquired = result.rowcount == 1
+            if not acquired:
+                # First use: create the row, unless another worker just did
+                exists = select(CronLog.id).where(CronLog.job_name == self.name).exists()
+                result = session.exec(
+                    insert(CronLog).from_select(
+                        ["job_name", "last_run", "lease_owner", "lease_expires_at"],
+                        select(
+                            literal(self.name),
+                            literal(now, DateTime),
+                            literal(self.owner),
+                            literal(expires_at, DateTime),
+                        ).where(~exists),
+                    )
+                )
+                acquired = result.rowcount == 1
+            session.commit()
+        return acquired
+
+    def release(self):
+        """Give the lease up so another worker can take it without waiting for expiry."""
+        with Session(self.engine) as session:
+            session.exec(
+                update(CronLog)
+                .where(CronLog.job_name == self.name, CronLog.lease_owner == self.owner)
+                .values(lease_owner=None, lease_expires_at=None)
+            )
+            session.commit()
+
+
+def holder(session: Session, name: str = AUTOMATION_LEASE, now: Optional[datetime] = None) -> Optional[str]:
+    """The worker currently holding the lease, if any."""
+    now = now or datetime.utcnow()
+    row = session.exec(select(CronLog).where(CronLog.job_name == name)).first()
+    if row is None or row.lease_owner is None or row.lease_expires_at is None or row.lease_expires_at < now:
+        return None
+    return row.lease_owner
@@ -3,41 +3,62 @@ This file is a FastAPI backend for tracking job applications. It provides:
 - User signup / login via JWT tokens
 - CRUD for "applications" (job applications)
 - A simple automation (cron) that updates application statuses and creates notifications
-- Endpoints for metrics, notifications, and debugging
+- Endpoints for metrics, notifications, and administration
 """
 
 # Standard library imports
-import dateutil.parser
 import os
 
 import re
 import jwt
+import json
+import asyncio
 import logging
 
 #Creating env files for security 
 from dotenv import load_dotenv
 
 # FastAPI and auth
-from fastapi import FastAPI, HTTPException, status, Depends
+from fastapi import FastAPI, HTTPException, status, Depends, Header, Query, Request, Response, Body
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from fastapi.security import OAuth2PasswordBearer
 
 # Database and project modules
 from sqlmodel import Session, select
-from backend.db import engine, create_db_and_tables
+from sqlalchemy import func, update
+from backend import db
+from backend.db import engine, create_db_and_tables, run_db, dispose_engines
 from backend.models import User, Application
 
-#Password Hashing
-from passlib.context import CryptContext
-
 #Pydantic Models
 from pydantic import BaseModel, EmailStr, constr, validator
 
-from typing import Optional
-from datetime import datetime, timedelta
-from apscheduler.schedulers.background import BackgroundScheduler
+from typing import Any, List, Optional
+from datetime import datetime, timedelta, timezone
 
 
 from backend.models import CronLog, AppNotification, Application, ApplicationTimeline
+from backend.automation import FOLLOWUP_JOB_NAME, next_due_time, run_followup_pass
+from backend import counters
+from backend.pagination import paginate, parse_sort
+from backend.etags import conditional_get, data_version
+from backend.events import hub, notification_event
+from backend import passwords
+from backend import imports
+from backend.exports import EXPORT_FORMATS, export_rows
+from backend import search
+from backend import timeline
+from backend import leases
+from backend import runs
+from backend import instrumentation
+from backend import querystats
+from backend import admin
+from backend import schemas
+from backend.cache import read_cache
+from backend.schemas import APPLICATION_COLUMNS, NOTIFICATION_COLUMNS, TIMELINE_EVENT_COLUMNS
+from backend.instrumentation import MetricsMiddleware
+from backend.scheduling import FollowupScheduler
 
 
 load_dotenv()
@@ -57,8 +78,15 @@ logger = logging.getLogger(__name__)
 SECRET_KEY = "superdupersecret"
 ALGORITHM = "HS256"
 
+# A URL the browser opens by itself (a download link, an EventSource) cannot
+# carry an Authorization header, and URLs end up in access logs, history and Referer
+# headers. So it gets a token from POST /link-token instead of the session
+# token: good for one endpoint (its scope) for LINK_TOKEN_TTL seconds.
+LINK_TOKEN_SCOPES = {"export", "stream"}
+LINK_TOKEN_TTL = int(os.getenv("LINK_TOKEN_TTL", "60"))
+
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+oauth2_scheme_optional = OAuth2PasswordBearer(tokenUrl="login", auto_error=False)
 
 #Creating Tables for DB
 create_db_and_tables()
@@ -73,6 +101,7 @@ def get_current_user(token: str = Depends(oauth2_scheme)):
 
     Notes:
     - Decodes JWT and expects 'sub' and 'email' claims
+    - Link tokens (with a 'scope' claim) are not session tokens and are refused
     - If token invalid, raises 401
     """
     credentials_exception = HTTPException(
@@ -84,11 +113,39 @@ def get_current_user(token: str = Depends(oauth2_scheme)):
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         user_id = payload.get("sub")
         email = payload.get("email")
-        if user_id is None or email is None:
+        if user_id is None or email is None or "scope" in payload:
             raise credentials_exception
         return {"id": user_id, "email": email, "name": payload.get("name")}
     except jwt.PyJWTError:
         raise credentials_exception
+
+
+def get_current_user_or_link_token(scope: str):
+    """
+    Dependency for endpoints the browser opens by URL: the session token in
+    the Authorization header as usual, or else a `token` query parameter
+    issued by POST /link-token for `scope`. A session token is never accepted
+    from the query string. The current_user dict then has the id only.
+    """
+    def dependency(
+        token: Optional[str] = Depends(oauth2_scheme_optional),
+        query_token: Optional[str] = Query(None, alias="token"),
+    ):
+        if token:
+            return get_current_user(token)
+        try:
+            payload = jwt.decode(query_token or "", SECRET_KEY, algorithms=[ALGORITHM])
+        except jwt.PyJWTError:
+            payload = {}
+        if payload.get("scope") != scope or payload.get("sub") is None:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Could not validate credentials",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+        return {"id": payload["sub"], "email": None, "name": None}
+
+    return dependency
     
 # --- Pydantic request models ---
 # These define and validate payloads coming into API endpoints
@@ -122,6 +179,10 @@ class UpdateAppRequest(BaseModel):
     notes: Optional[str] = None
     followed_up_at: Optional[datetime] = None
 
+class MarkReadRequest(BaseModel):
+    ids: Optional[List[int]] = None
+    before: Optional[datetime] = None
+
 class LoginRequest(BaseModel):
     email: str
     password: str
@@ -176,10 +237,22 @@ class UpdateUserRequest(BaseModel):
 
 
 # --- FastAPI app and endpoints ---
-app = FastAPI()
+# Responses are encoded with orjson; response models are in backend/schemas.py
+app = FastAPI(default_response_class=ORJSONResponse)
+
+# The Streamlit page opens the notification stream straight from the browser
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=os.getenv("FRONTEND_ORIGINS", "http://localhost:8501,http://127.0.0.1:8501").split(","),
+    allow_headers=["Authorization", "Last-Event-ID"],
+)
+app.add_middleware(MetricsMiddleware)
+querystats.install(engine)
+if db.async_engine:
+    querystats.install(db.async_engine.sync_engine)
 
 @app.post("/signup")
-def signup(user: SignupRequest):
+async def signup(user: SignupRequest):
     """
     Create a new user. Password is hashed. Email uniqueness is checked.
 
@@ -187,11 +260,13 @@ def signup(user: SignupRequest):
     Notes/risks:
     - Password is truncated to 72 bytes before hashing (bcrypt limit) — communicated in code but be explicit in docs.
     - No email verification.
+    - Hashing runs on the bounded password executor; 503 when it is saturated.
     """
     # Hash the password
-    hashed_password = pwd_context.hash(user.password[:72])
-    # Check if email already exists
-    with Session(engine) as session:
+    hashed_password = await passwords.hash_password(user.password[:72])
+
+    def create(session):
+        # Check if email already exists
         existing_user = session.exec(
             select(User).where(User.email == user.email)
         ).first()
@@ -207,29 +282,43 @@ def signup(user: SignupRequest):
         session.commit()
         session.refresh(new_user)
         return {"id": new_user.id, "email": new_user.email, "name": new_user.name}
+
+    return await run_db(create)
     
 @app.post("/login")
-def login(request: LoginRequest):
+async def login(request: LoginRequest):
     """
     Authenticate user and return JWT token valid for 1 hour.
+
+    A stored hash made with a bcrypt cost other than BCRYPT_ROUNDS is replaced
+    after a successful login.
     """
-    with Session(engine) as session:
-        user = session.exec(
+    def load(session):
+        return session.exec(
             select(User).where(User.email == request.email)
         ).first()
-        if not user:
-            raise HTTPException(status_code=401, detail="Invalid email or password")
-        if not pwd_context.verify(request.password, user.password_hash):
-            raise HTTPException(status_code=401, detail="Invalid email or password")
-        # Create JWT token
-        payload = {
-            "sub": user.id,
-            "exp": datetime.utcnow() + timedelta(hours=1),   # expires in 1 hour
-            "email": user.email,
-            "name": user.name,
-        }
-        token = jwt.encode(payload, SECRET_KEY, algorithm="HS256")
-        return {"token": token, "user": {"id": user.id, "email": user.email, "name": user.name}}
+
+    user = await run_db(load)
+    if not user:
+        raise HTTPException(status_code=401, detail="Invalid email or password")
+    valid, new_hash = await passwords.verify_password(request.password, user.password_hash)
+    if not valid:
+        raise HTTPException(status_code=401, detail="Invalid email or password")
+    if new_hash:
+        def rehash(session):
+            session.exec(update(User).where(User.id == user.id).values(password_hash=new_hash))
+            session.commit()
+
+        await run_db(rehash)
+    # Create JWT token
+    payload = {
+        "sub": user.id,
+        "exp": datetime.utcnow() + timedelta(hours=1),   # expires in 1 hour
+        "email": user.email,
+        "name": user.name,
+    }
+    token = jwt.encode(payload, SECRET_KEY, algorithm="HS256")
+    return {"token": token, "user": {"id": user.id, "email": user.email, "name": user.name}}
     
 
 @app.get("/me")
@@ -237,20 +326,113 @@ def read_me(current_user: dict = Depends(get_current_user)):
     return {"user": current_user}
 
 
-@app.get("/apps")
-def get_apps(current_user: dict = Depends(get_current_user)):
-    with Session(engine) as session:
-        apps = session.exec(
-            select(Application).where(Application.user_id == current_user["id"])
-        ).all()
-        return apps
+@app.post("/link-token")
+def issue_link_token(scope: str = Query(...), current_user: dict = Depends(get_current_user)):
+    """
+    A short-lived token to put in a URL the browser opens by itself, as
+    `?token=`. `scope` names the one endpoint it is good for: "export" for
+    GET /apps/export, "stream" for GET /notifications/stream. It expires
+    after `expires_in` seconds; a stream already open stays open.
+    """
+    if scope not in LINK_TOKEN_SCOPES:
+        raise HTTPException(status_code=400, detail=f"Unknown scope '{scope}'. Use one of: {', '.join(sorted(LINK_TOKEN_SCOPES))}")
+    payload = {
+        "sub": current_user["id"],
+        "scope": scope,
+        "exp": datetime.utcnow() + timedelta(seconds=LINK_TOKEN_TTL),
+    }
+    return {"token": jwt.encode(payload, SECRET_KEY, algorithm=ALGORITHM), "expires_in": LINK_TOKEN_TTL}
+
+
+APP_SORTS = {
+    "updated_at": Application.updated_at,
+    "applied_date": Application.applied_date,
+}
+
+@app.get("/apps", response_model=schemas.ApplicationPage)
+async def get_apps(
+    request: Request,
+    response: Response,
+    status_filter: Optional[str] = Query(None, alias="status"),
+    sort: str = "-updated_at",
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    current_user: dict = Depends(get_current_user),
+):
+    """
+    One page of the user's applications, newest activity first by default.
+
+    Pass the returned next_cursor back as `cursor` to get the following page;
+    it is null on the last page. `sort` is one of APP_SORTS, '-' prefixed for
+    descending order. Each item carries its timeline `event_count`.
+    """
+    sort_column, descending = parse_sort(sort, APP_SORTS)
+
+    def load(session):
+        query = select(*APPLICATION_COLUMNS).where(Application.user_id == current_user["id"])
+        if status_filter:
+            query = query.where(Application.status == status_filter)
+        apps, next_cursor = paginate(
+            session, query, sort_column, Application.id, limit, cursor=cursor, descending=descending
+        )
+        return {"items": timeline.with_event_counts(session, current_user["id"], apps), "next_cursor": next_cursor}
+
+    return await read_cache.fetch(request, response, current_user["id"], load)
 
-@app.post("/apps")
-def create_app(
+@app.get("/apps/search", response_model=schemas.ApplicationPage)
+async def search_apps(
+    q: str = Query(..., min_length=1, max_length=200),
+    status_filter: Optional[str] = Query(None, alias="status"),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    current_user: dict = Depends(get_current_user),
+):
+    """
+    Full-text search over company, role, city, country and notes.
+
+    Every word of `q` must match, the last one as a word prefix ("data eng"
+    finds "Data Engineer"). Results are ranked best match first and paged
+    with next_cursor like GET /apps.
+
+    Results are capped: only the 2,000 most recently added matching
+    applications (search.MAX_CANDIDATES) are ranked. Narrow `q` to reach
+    older ones.
+    """
+    def load(session):
+        apps, next_cursor = search.search(
+            session, q, current_user["id"], limit, cursor=cursor, status=status_filter
+        )
+        return {"items": timeline.with_event_counts(session, current_user["id"], apps), "next_cursor": next_cursor}
+
+    return await run_db(load)
+
+@app.get("/apps/export")
+def export_apps(
+    export_format: str = Query("csv", alias="format"),
+    current_user: dict = Depends(get_current_user_or_link_token("export")),
+):
+    """
+    Download all of the user's applications as CSV or NDJSON (`format`).
+
+    The body is streamed in chunks straight from the database cursor. Accepts
+    an "export" link token (POST /link-token) as the `token` query parameter,
+    so the frontend can link to it directly.
+    """
+    if export_format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported format '{export_format}'. Use one of: {', '.join(EXPORT_FORMATS)}")
+    media_type, filename = EXPORT_FORMATS[export_format]
+    return StreamingResponse(
+        export_rows(current_user["id"], export_format),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+@app.post("/apps", response_model=schemas.ApplicationOut)
+async def create_app(
     app_in: CreateAppRequest,
     current_user: dict = Depends(get_current_user)
 ):
-    with Session(engine) as session:
+    def create(session):
         new_app = Application(
             user_id=current_user["id"],
             company_name=app_in.company_name,
@@ -267,11 +449,54 @@ def create_app(
         session.add(new_app)
         session.commit()
         session.refresh(new_app)
+        followups.consider(new_app)
         return new_app
 
-@app.put("/apps/{id}")
-def update_app(id: int, app_in: UpdateAppRequest, current_user: dict = Depends(get_current_user)):
-    with Session(engine) as session:
+    created = await run_db(create)
+    read_cache.invalidate(current_user["id"])
+    return created
+
+@app.post("/apps/bulk")
+async def create_apps_bulk(
+    rows: List[Any] = Body(...),
+    current_user: dict = Depends(get_current_user),
+):
+    """
+    Create many applications from a JSON array of POST /apps bodies.
+
+    Invalid rows are skipped and listed (1-based) in `errors`; the rest are
+    inserted in batched transactions. Returns {"created", "failed", "errors"}.
+    """
+    if len(rows) > imports.BULK_MAX_ROWS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {imports.BULK_MAX_ROWS} rows per request; use /apps/import for larger files",
+        )
+    report = await imports.import_rows(imports.json_records(rows), CreateAppRequest, current_user["id"])
+    if report.created:
+        await run_db(followups.resync)
+    return report.as_dict()
+
+@app.post("/apps/import")
+async def import_apps_csv(request: Request, current_user: dict = Depends(get_current_user)):
+    """
+    Create applications from a CSV request body (Content-Type: text/csv).
+
+    The first line names the columns, using the POST /apps field names. The
+    body is parsed as it arrives, so the file is never held in memory whole.
+    Same report as /apps/bulk, with row numbers counting the header as row 1.
+    A row longer than imports.MAX_RECORD_BYTES (64 KiB), usually an
+    unbalanced quote, is reported as failed and reading resumes on the line
+    after it.
+    """
+    report = await imports.import_rows(imports.csv_records(request.stream()), CreateAppRequest, current_user["id"])
+    if report.created:
+        await run_db(followups.resync)
+    return report.as_dict()
+
+@app.put("/apps/{id}", response_model=schemas.ApplicationOut)
+async def update_app(id: int, app_in: UpdateAppRequest, current_user: dict = Depends(get_current_user)):
+    def update_row(session):
         db_app = session.get(Application, id)
         if not db_app or db_app.user_id != current_user["id"]:
             raise HTTPException(status_code=404, detail="Application not found")
@@ -297,63 +522,221 @@ def update_app(id: int, app_in: UpdateAppRequest, current_user: dict = Depends(g
 
         session.commit()
         session.refresh(db_app)
+        followups.consider(db_app)
         return db_app
+
+    updated = await run_db(update_row)
+    read_cache.invalidate(current_user["id"])
+    return updated
     
 @app.delete("/apps/{id}")
-def delete_app(id: int, current_user: dict = Depends(get_current_user)):
-    with Session(engine) as session:
+async def delete_app(id: int, current_user: dict = Depends(get_current_user)):
+    def delete_row(session):
         db_app = session.get(Application, id)
         if not db_app or db_app.user_id != current_user["id"]:
             raise HTTPException(status_code=404, detail="Application not found")
         session.delete(db_app)
         session.commit()
         return {"detail": "Application deleted"}
+
+    deleted = await run_db(delete_row)
+    read_cache.invalidate(current_user["id"])
+    return deleted
     
-@app.get("/notifications")
-def get_notifications(current_user: dict = Depends(get_current_user)):
-    with Session(engine) as session:
+@app.get("/notifications", response_model=List[schemas.NotificationOut])
+async def get_notifications(
+    request: Request,
+    response: Response,
+    limit: int = Query(50, ge=1, le=200),
+    current_user: dict = Depends(get_current_user),
+):
+    """The newest unread notifications (at most `limit`)."""
+    def load(session):
         notifications = session.exec(
-            select(AppNotification)
+            select(*NOTIFICATION_COLUMNS)
             .where(AppNotification.user_id == current_user["id"])
             .where(AppNotification.read == False)  # only unread
             .order_by(AppNotification.created_at.desc())
+            .limit(limit)
         ).all()
         return notifications
-    
+
+    return await read_cache.fetch(request, response, current_user["id"], load)
+
+@app.get("/notifications/unread-count")
+async def get_unread_notification_count(current_user: dict = Depends(get_current_user)):
+    unread = await run_db(counters.unread_count, current_user["id"])
+    return {"unread": unread}
+
+@app.get("/notifications/history", response_model=schemas.NotificationPage)
+async def get_notification_history(
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    current_user: dict = Depends(get_current_user),
+):
+    """All notifications, read or not, newest first. Follow next_cursor for older pages."""
+    def load(session):
+        notifications, next_cursor = paginate(
+            session,
+            select(*NOTIFICATION_COLUMNS).where(AppNotification.user_id == current_user["id"]),
+            AppNotification.created_at,
+            AppNotification.id,
+            limit,
+            cursor=cursor,
+        )
+        return {"items": notifications, "next_cursor": next_cursor}
+
+    return await run_db(load)
+
 @app.post("/notifications/mark-read")
-def mark_all_notifications_as_read(current_user: dict = Depends(get_current_user)):
-    with Session(engine) as session:
-        notifications = session.exec(
-            select(AppNotification)
-            .where(AppNotification.user_id == current_user["id"])
-            .where(AppNotification.read == False)
-        ).all()
-        logger.info(f"Marking as read: {[n.id for n in notifications]}")
-        for notif in notifications:
-            notif.read = True
-            session.add(notif)
+async def mark_all_notifications_as_read(
+    request: Optional[MarkReadRequest] = None,
+    current_user: dict = Depends(get_current_user),
+):
+    """
+    Mark unread notifications as read in one UPDATE. Without a body every
+    unread notification is marked; `ids` and/or `before` narrow it down.
+    """
+    query = (
+        update(AppNotification)
+        .where(AppNotification.user_id == current_user["id"])
+        .where(AppNotification.read == False)
+    )
+    if request and request.ids is not None:
+        query = query.where(AppNotification.id.in_(request.ids))
+    if request and request.before is not None:
+        query = query.where(AppNotification.created_at <= request.before)
+    def mark(session):
+        result = session.exec(query.values(read=True))
         session.commit()
-        return {"marked_read": len(notifications)}
+        return {"marked_read": result.rowcount}
+
+    marked = await run_db(mark)
+    read_cache.invalidate(current_user["id"])
+    return marked
+
+NOTIFICATION_STREAM_KEEPALIVE = 15  # seconds
+
+def _notifications_after(session, user_id: int, last_id: int):
+    return session.exec(
+        select(AppNotification)
+        .where(AppNotification.user_id == user_id, AppNotification.id > last_id)
+        .order_by(AppNotification.id)
+    ).all()
+
+def _latest_notification_id(session, user_id: int) -> int:
+    latest = session.exec(
+        select(func.max(AppNotification.id)).where(AppNotification.user_id == user_id)
+    ).one()
+    return latest or 0
+
+def _sse(event: dict) -> str:
+    return f"id: {event['id']}\nevent: notification\ndata: {json.dumps(event)}\n\n"
+
+@app.get("/notifications/stream")
+async def stream_notifications(
+    request: Request,
+    last_event_id: Optional[str] = Header(None),
+    current_user: dict = Depends(get_current_user_or_link_token("stream")),
+):
+    """
+    Server-sent events: one `notification` event per new AppNotification.
+    Browsers' EventSource cannot set headers: it passes a "stream" link token
+    (POST /link-token) as the `token` query parameter.
+
+    Events are pushed from the in-process hub (backend/events.py). A reconnecting
+    client's Last-Event-ID replays whatever it missed. Every keepalive the user's
+    data version is checked (one primary-key read) so that notifications
+    committed by another worker process are still delivered.
+    """
+    user_id = int(current_user["id"])
+    try:
+        last_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid Last-Event-ID")
+
+    async def event_stream():
+        nonlocal last_id
+        subscription = hub.subscribe(user_id)
+        try:
+            yield "retry: 5000\n\n"
+            version = await run_db(data_version, user_id)
+            if last_id is None:
+                last_id = await run_db(_latest_notification_id, user_id)
+            else:
+                for notification in await run_db(_notifications_after, user_id, last_id):
+                    last_id = notification.id
+                    yield _sse(notification_event(notification))
+
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(subscription.queue.get(), timeout=NOTIFICATION_STREAM_KEEPALIVE)
+                except asyncio.TimeoutError:
+                    current = await run_db(data_version, user_id)
+                    if current != version:
+                        version = current
+                        for notification in await run_db(_notifications_after, user_id, last_id):
+                            last_id = notification.id
+                            yield _sse(notification_event(notification))
+                    yield ": keepalive\n\n"
+                    continue
+                if event["id"] <= last_id:
+                    continue
+                last_id = event["id"]
+                yield _sse(event)
+        finally:
+            hub.unsubscribe(subscription)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
     
-@app.get("/debug/apps")
-def debug_apps():
+def get_admin_user(current_user: dict = Depends(get_current_user)):
+    """Like get_current_user, but 403 unless the account is listed in ADMIN_USER_IDS."""
     with Session(engine) as session:
-        apps = session.exec(select(Application)).all()
-        result = []
-        for a in apps:
-            result.append({
-                "id": a.id,
-                "company": a.company_name,
-                "role": a.role_title,
-                "status": a.status,
-                "followup_date": str(a.followup_date),
-                "followed_up_at": str(a.followed_up_at) if hasattr(a, "followed_up_at") else None
-            })
-        return result
+        if not admin.is_admin(session, current_user["id"]):
+            raise HTTPException(status_code=403, detail="Admin access required")
+    return current_user
+
+@app.get("/admin/apps")
+def admin_apps(
+    user_id: Optional[int] = None,
+    status_filter: Optional[str] = Query(None, alias="status"),
+    applied_from: Optional[datetime] = None,
+    applied_to: Optional[datetime] = None,
+    after_id: int = Query(0, ge=0),
+    limit: int = Query(admin.ADMIN_PAGE_ROWS, ge=1, le=admin.ADMIN_MAX_PAGE_ROWS),
+    admin_user: dict = Depends(get_admin_user),
+):
+    """
+    Every user's applications as NDJSON, in id order, streamed from a cursor.
+
+    Filters: `user_id`, `status`, and applied_date from `applied_from`
+    (inclusive) to `applied_to` (exclusive). At most `limit` rows with ids
+    above `after_id`; pass the last id received as `after_id` for the next page.
+    """
+    filters = admin.AppFilters(user_id=user_id, status=status_filter, applied_from=applied_from, applied_to=applied_to)
+    return StreamingResponse(admin.stream_apps(filters, after_id, limit), media_type="application/x-ndjson")
+
+@app.get("/admin/users")
+def admin_users(
+    after_id: int = Query(0, ge=0),
+    limit: int = Query(admin.ADMIN_PAGE_ROWS, ge=1, le=admin.ADMIN_MAX_PAGE_ROWS),
+    admin_user: dict = Depends(get_admin_user),
+):
+    """All users (without password hashes) as NDJSON, paged like /admin/apps."""
+    return StreamingResponse(admin.stream_users(after_id, limit), media_type="application/x-ndjson")
     
+
 @app.put("/me")
-def update_me(request: UpdateUserRequest, current_user: dict = Depends(get_current_user)):
-    with Session(engine) as session:
+async def update_me(request: UpdateUserRequest, current_user: dict = Depends(get_current_user)):
+    password_hash = None
+    if request.password:
+        password_hash = await passwords.hash_password(request.password[:72])
+
+    def update_user(session):
         user = session.get(User, current_user["id"])
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
@@ -361,13 +744,15 @@ def update_me(request: UpdateUserRequest, current_user: dict = Depends(get_curre
             user.email = request.email
         if request.name:
             user.name = request.name
-        if request.password:
-            user.password_hash = pwd_context.hash(request.password[:72])
+        if password_hash:
+            user.password_hash = password_hash
         session.add(user)
         session.commit()
         session.refresh(user)
         return {"id": user.id, "email": user.email, "name": user.name}
 
+    return await run_db(update_user)
+
 @app.delete("/me")
 def delete_me(current_user: dict = Depends(get_current_user)):
     with Session(engine) as session:
@@ -376,165 +761,163 @@ def delete_me(current_user: dict = Depends(get_current_user)):
             raise HTTPException(status_code=404, detail="User not found")
         session.delete(user)
         session.commit()
-        return {"detail": "Account deleted"}
+    read_cache.invalidate(current_user["id"])
+    return {"detail": "Account deleted"}
 
 # --- Automation / Cron logic ---
 def run_cron_updates(for_user_id=None, engine=None):
+    """
+    Run the follow-up automation and return the transitions made per rule.
 
+    The scheduler calls this without arguments for a full pass over every user.
+    With for_user_id only that user's applications are touched.
+    """
     logger.info("APScheduler: Running automatic followup check…")
-    from sqlmodel import Session, select
-    from backend.models import Application, AppNotification, CronLog
 
     if engine is None:
         from backend.db import engine as default_engine
         engine = default_engine
 
-    updated_count = 0
-    today = datetime.utcnow().date()
-
-    with Session(engine) as session:
-
-        app_query = select(Application)
-        if for_user_id:
-            app_query = app_query.where(Application.user_id == int(for_user_id))
-
-        # Move Active -> Pending
-        active_apps = session.exec(select(Application).where(Application.status == "active")).all()
-
-        for app in active_apps:
-            if app.followup_date and app.followup_date.date() <= today:
-                app.status = "pending"
-                updated_count += 1
-
-                notification = AppNotification(
-                    app_id=app.id,
-                    user_id=app.user_id,
-                    message=f"Follow-up date reached for {app.company_name} - {app.role_title}",
-                    created_at=datetime.utcnow()
-                )
-                session.add(notification)
-
-                timeline = ApplicationTimeline(
-                    app_id=app.id,
-                    user_id=app.user_id,
-                    event_type="status-changed",
-                    old_status="active",
-                    new_status="pending",
-                    notes="Status auto-switched from active to pending by automation"
-                )
-                session.add(timeline)
-
-        # Move Followed-up -> Not Responded after 7 days
-        followed_up_apps = session.exec(select(Application).where(Application.status == "followed-up")).all()
-        for app in followed_up_apps:
-            logger.info(f"App {app.id}: status={app.status}, followed_up_at={app.followed_up_at} ({type(app.followed_up_at)})")
-            fup = app.followed_up_at
-            if fup:
-                if isinstance(fup, str):
-                    try:
-                        fup = dateutil.parser.parse(fup)
-                    except Exception as e:
-                        logger.warning(f"App {app.id} has bad followed_up_at string: {app.followed_up_at}, skipping.")
-                        continue
-
-            if datetime.utcnow() <= (fup + timedelta(days=7)):
-                logger.info(f"Updating App {app.id} to not-responded")
-                app.status = "not-responded"
-                updated_count += 1 
-
-                notification = AppNotification(
-                    app_id=app.id,
-                    user_id=app.user_id,
-                    message=f"No response from {app.company_name} - {app.role_title}",
-                    created_at=datetime.utcnow() 
-                )
-                session.add(notification)
-
-                timeline = ApplicationTimeline(
-                    app_id=app.id,
-                    user_id=app.user_id,
-                    event_type="status-changed",
-                    old_status="followed-up",
-                    new_status="not-responded",
-                    notes="Status auto-switched from followed-up to not-responded by automation"
-                )
-                session.add(timeline)
-        
-        cron_entry = session.exec(select(CronLog).where(CronLog.job_name == "followup_check")).first()
-        now = datetime.utcnow()
-        if cron_entry:
-            cron_entry.last_run = now
-        else:
-            cron_entry = CronLog(job_name="followup_check", last_run=now)
-            session.add(cron_entry)
+    user_id = int(for_user_id) if for_user_id is not None else None
+    transitions = run_followup_pass(engine, user_id=user_id, notify=hub, on_commit=read_cache.invalidate_many)
 
-        session.commit()
-    logger.info(f"[APScheduler] Updated {updated_count} applications via automation")
-    return updated_count
+    logger.info(f"[APScheduler] Updated {sum(transitions.values())} applications via automation ({transitions})")
+    return transitions
 
 @app.post("/automation/run-now")
 def run_automation_now(current_user: dict = Depends(get_current_user)):
-    count = run_cron_updates(for_user_id=current_user["id"])
-    return {"processed": count}
+    transitions = run_cron_updates(for_user_id=current_user["id"])
+    return {"processed": sum(transitions.values()), "transitions": transitions}
 
 @app.get("/cron/last-run")
 def get_last_run():
+    next_run = followups.next_run.isoformat() if followups.next_run else None
     with Session(engine) as session:
         cron_entry = session.exec(select(CronLog).where(CronLog.job_name == "followup_check")).first()
+        leader = leases.holder(session)
         if cron_entry:
-            return {"last_run": cron_entry.last_run.isoformat()}
+            return {"last_run": cron_entry.last_run.isoformat(), "next_run": next_run, "leader": leader}
         else:
-            return {"last_run": None}
+            return {"last_run": None, "next_run": next_run, "leader": leader}
+
+@app.get("/cron/stats")
+def get_cron_stats(window: int = Query(100, ge=2, le=runs.AUTOMATION_HISTORY_LIMIT)):
+    """
+    Duration percentiles, trend and totals over the last `window` automation
+    runs. `overdue_seconds` is how long the oldest due transition has been
+    waiting; it should stay near zero while the automation keeps up.
+    """
+    with Session(engine) as session:
+        stats = runs.summary(session, FOLLOWUP_JOB_NAME, window)
+        earliest_due = next_due_time(session)
+    now = datetime.utcnow()
+    overdue = (now - earliest_due).total_seconds() if earliest_due and earliest_due < now else 0
+    stats["overdue_seconds"] = round(overdue, 3)
+    return stats
         
 
 @app.get("/metrics")
-def get_app_metrics(current_user: dict = Depends(get_current_user)):
-    with Session(engine) as session:
-        total_apps = len(list(session.exec(
-            select(Application).where(Application.user_id == current_user["id"])
-        )))
-        statuses = ["pending", "active", "followed-up", "not-responded", "rejected"]
-        status_counts = {}
-        for status in statuses:
-            status_counts[status] = len(list(session.exec(
-                select(Application).where(
-                    Application.user_id == current_user["id"],
-                    Application.status == status
-                )
-            )))
-    return {
-        "applications_total": total_apps,
-        "applications_by_status": status_counts,
-    }
+async def get_app_metrics(request: Request, response: Response, current_user: dict = Depends(get_current_user)):
+    def load(session):
+        status_counts = counters.status_counts(session, current_user["id"])
+        return {
+            "applications_total": sum(status_counts.values()),
+            "applications_by_status": status_counts,
+        }
 
-@app.get("/apps/{id}/timeline")
-def get_app_timeline(id: int, current_user: dict = Depends(get_current_user)):
-    with Session(engine) as session:
-        timeline = session.exec(
-            select(ApplicationTimeline)
+    return await read_cache.fetch(request, response, current_user["id"], load)
+
+@app.get("/apps/{id}/timeline", response_model=List[schemas.TimelineEventOut])
+async def get_app_timeline(
+    id: int, request: Request, response: Response, current_user: dict = Depends(get_current_user),
+):
+    def load(session):
+        return session.exec(
+            select(*TIMELINE_EVENT_COLUMNS)
             .where(ApplicationTimeline.app_id == id)
             .where(ApplicationTimeline.user_id == current_user["id"])
             .order_by(ApplicationTimeline.event_time)
         ).all()
-        return timeline
 
-scheduler = None
+    return await read_cache.fetch(request, response, current_user["id"], load, etag=False)
+
+@app.get("/timeline", response_model=schemas.TimelinePage)
+async def get_timeline(
+    request: Request,
+    response: Response,
+    app_ids: Optional[str] = None,
+    event_type: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    current_user: dict = Depends(get_current_user),
+):
+    """
+    The user's timeline events across all applications, newest first.
+
+    `app_ids` (comma-separated, up to 100) fetches the timelines of a batch
+    of applications in one request; `event_type` keeps one kind of event.
+    Paged with next_cursor like GET /apps.
+    """
+    ids = timeline.parse_app_ids(app_ids)
+
+    def load(session):
+        not_modified = conditional_get(session, request, response, current_user["id"])
+        if not_modified:
+            return not_modified
+        events, next_cursor = paginate(
+            session,
+            timeline.feed_query(current_user["id"], app_ids=ids, event_type=event_type),
+            ApplicationTimeline.event_time,
+            ApplicationTimeline.id,
+            limit,
+            cursor=cursor,
+        )
+        return {"items": events, "next_cursor": next_cursor}
+
+    return await run_db(load)
+
+# Runs the automation when the next follow-up falls due instead of polling
+followups = FollowupScheduler(engine, run_cron_updates)
+
+instrumentation.add_pool_gauges(
+    lambda: [("sync", engine.pool)] + ([("async", db.async_engine.pool)] if db.async_engine else [])
+)
+instrumentation.gauges.add(
+    "automation_is_leader", "1 if this worker holds the automation lease.", lambda: int(followups.is_leader),
+)
+instrumentation.gauges.add(
+    "automation_next_run_timestamp_seconds", "When this worker will next run the automation (unset if not armed).",
+    lambda: followups.next_run.replace(tzinfo=timezone.utc).timestamp() if followups.next_run else None,
+)
+instrumentation.gauges.add(
+    "password_hash_in_flight", "bcrypt jobs running or queued.", passwords.in_flight,
+)
+instrumentation.gauges.add("read_cache_entries", "Responses held by the read cache.", lambda: len(read_cache))
+instrumentation.gauges.add(
+    "notification_stream_users", "Users with an open notification stream.", lambda: len(hub.subscribed_users()),
+)
+
+@app.get("/internal/metrics", include_in_schema=False)
+def internal_metrics():
+    """Prometheus scrape endpoint; /metrics is the user-facing statistics endpoint."""
+    content, content_type = instrumentation.exposition()
+    return Response(content=content, media_type=content_type)
 
 @app.on_event("startup")
 async def startup_event():
-    global scheduler
     logger.info("FastAPI: Starting up and initializing scheduler...")
-    scheduler = BackgroundScheduler()
-    scheduler.add_job(run_cron_updates, 'interval', seconds = 10)
-    scheduler.start()
-    logger.info("FastAPI: Scheduler started successfully!")
+    followups.start()
+    if followups.is_leader:
+        logger.info(f"FastAPI: Scheduler started, next follow-up check: {followups.next_run or 'nothing pending'}")
+    else:
+        logger.info("FastAPI: Scheduler started, automation runs in another worker")
 
 @app.on_event("shutdown")
 async def shutdown_event():
-    global scheduler
-    if scheduler:
-        logger.info("FastAPI: Shutting down scheduler...")
-        scheduler.shutdown()
+    logger.info("FastAPI: Shutting down scheduler...")
+    followups.shutdown()
+    passwords.shutdown()
+    await dispose_engines()
 
     
 
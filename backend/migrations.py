@@ -0,0 +1,349 @@
+"""
+Versioned schema migrations.
+
+`SQLModel.metadata.create_all` only creates missing tables, so an existing
+database never picks up new indexes, columns or triggers. Each step below is
+applied once, in version order, and recorded in the `schemamigration` table.
+Steps are written to be idempotent because a brand new database has already
+been given the current schema by `create_all` before they run.
+
+Usage (from the repo root):
+    python -m backend.migrations upgrade   # apply pending steps
+    python -m backend.migrations current   # show the applied version
+    python -m backend.migrations check     # fail if a hot query full-scans a table
+"""
+
+import sys
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, List, Optional
+
+from sqlalchemy import event, func, tuple_
+from sqlmodel import select
+
+from backend import counters, etags, search
+from backend.models import (
+    AppNotification, Application, ApplicationStatusCount, ApplicationTimeline, AutomationRun, CronLog,
+    SchemaMigration, User, UnreadNotificationCount, UserDataVersion,
+)
+from backend.schemas import APPLICATION_COLUMNS, NOTIFICATION_COLUMNS, TIMELINE_EVENT_COLUMNS
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    name: str
+    upgrade: Callable
+
+
+def _add_column(conn, table, column, ddl):
+    existing = {row[1] for row in conn.exec_driver_sql(f'PRAGMA table_info("{table}")')}
+    if column not in existing:
+        conn.exec_driver_sql(f'ALTER TABLE "{table}" ADD COLUMN {column} {ddl}')
+
+
+def _create_indexes(conn, indexes):
+    for name, table, columns in indexes:
+        conn.exec_driver_sql(f'CREATE INDEX IF NOT EXISTS {name} ON "{table}" ({", ".join(columns)})')
+
+
+def _0001_application_followed_up_at(conn):
+    # Databases created before follow-up tracking lack this column
+    _add_column(conn, "application", "followed_up_at", "DATETIME")
+
+
+def _0002_query_indexes(conn):
+    _create_indexes(conn, [
+        ("ix_application_user_id_status", "application", ["user_id", "status"]),
+        ("ix_application_status_followup_date", "application", ["status", "followup_date"]),
+        ("ix_application_status_followed_up_at", "application", ["status", "followed_up_at"]),
+        ("ix_appnotification_user_id_read_created_at", "appnotification", ["user_id", "read", "created_at"]),
+        ("ix_applicationtimeline_app_id_user_id_event_time", "applicationtimeline", ["app_id", "user_id", "event_time"]),
+        ("ix_cronlog_job_name", "cronlog", ["job_name"]),
+    ])
+
+
+def _0003_application_status_counts(conn):
+    ApplicationStatusCount.__table__.create(conn, checkfirst=True)
+    counters.install(conn)
+
+
+def _0004_application_keyset_indexes(conn):
+    _create_indexes(conn, [
+        ("ix_application_user_id_updated_at", "application", ["user_id", "updated_at"]),
+        ("ix_application_user_id_status_updated_at", "application", ["user_id", "status", "updated_at"]),
+        ("ix_application_user_id_applied_date", "application", ["user_id", "applied_date"]),
+        ("ix_application_user_id_status_applied_date", "application", ["user_id", "status", "applied_date"]),
+    ])
+    # Superseded by the (user_id, status, updated_at) prefix
+    conn.exec_driver_sql("DROP INDEX IF EXISTS ix_application_user_id_status")
+
+
+def _0005_user_data_versions(conn):
+    UserDataVersion.__table__.create(conn, checkfirst=True)
+    etags.install(conn)
+
+
+def _0006_notification_counters(conn):
+    UnreadNotificationCount.__table__.create(conn, checkfirst=True)
+    counters.install_unread(conn)
+    _create_indexes(conn, [
+        ("ix_appnotification_user_id_created_at", "appnotification", ["user_id", "created_at"]),
+    ])
+
+
+def _0007_application_search(conn):
+    search.install(conn)
+
+
+def _0008_timeline_feed_indexes(conn):
+    _create_indexes(conn, [
+        ("ix_applicationtimeline_user_id_event_time", "applicationtimeline", ["user_id", "event_time"]),
+        ("ix_applicationtimeline_user_id_event_type_event_time", "applicationtimeline",
+         ["user_id", "event_type", "event_time"]),
+    ])
+
+
+def _0009_cronlog_leases(conn):
+    _add_column(conn, "cronlog", "lease_owner", "VARCHAR")
+    _add_column(conn, "cronlog", "lease_expires_at", "DATETIME")
+
+
+def _0010_cronlog_checkpoint(conn):
+    _add_column(conn, "cronlog", "checkpoint", "INTEGER")
+
+
+def _0011_automation_runs(conn):
+    AutomationRun.__table__.create(conn, checkfirst=True)
+
+
+MIGRATIONS: List[Migration] = [
+    Migration(1, "application_followed_up_at", _0001_application_followed_up_at),
+    Migration(2, "query_indexes", _0002_query_indexes),
+    Migration(3, "application_status_counts", _0003_application_status_counts),
+    Migration(4, "application_keyset_indexes", _0004_application_keyset_indexes),
+    Migration(5, "user_data_versions", _0005_user_data_versions),
+    Migration(6, "notification_counters", _0006_notification_counters),
+    Migration(7, "application_search", _0007_application_search),
+    Migration(8, "timeline_feed_indexes", _0008_timeline_feed_indexes),
+    Migration(9, "cronlog_leases", _0009_cronlog_leases),
+    Migration(10, "cronlog_checkpoint", _0010_cronlog_checkpoint),
+    Migration(11, "automation_runs", _0011_automation_runs),
+]
+
+
+@contextmanager
+def write_transaction(engine):
+    """
+    A connection in a transaction begun with BEGIN IMMEDIATE, committed when
+    the block ends and rolled back if it raises.
+
+    BEGIN IMMEDIATE takes SQLite's write lock up front, so whatever the block
+    reads stays true until it commits: another process doing the same waits
+    for the lock (busy_timeout) and then sees the outcome. The driver's own
+    transaction handling is switched off (AUTOCOMMIT) so that DDL runs inside
+    the transaction too.
+    """
+    with engine.connect() as conn:
+        conn.execution_options(isolation_level="AUTOCOMMIT")
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.exec_driver_sql("ROLLBACK")
+            raise
+        conn.exec_driver_sql("COMMIT")
+
+
+def _applied_version(conn) -> int:
+    SchemaMigration.__table__.create(conn, checkfirst=True)
+    applied = conn.execute(select(func.max(SchemaMigration.version))).scalar()
+    return applied or 0
+
+
+def current_version(engine) -> int:
+    with write_transaction(engine) as conn:
+        return _applied_version(conn)
+
+
+def upgrade(engine, target: Optional[int] = None) -> List[Migration]:
+    """
+    Apply every pending migration up to `target` (default: latest).
+
+    Each step runs in its own write_transaction together with its
+    bookkeeping row, so a failed step leaves the database at the previous
+    version. The version is read inside that transaction: when several
+    workers start on the same database, one applies the step and the others
+    wait for it, then find it recorded and skip it.
+    """
+    applied = []
+    for migration in MIGRATIONS:
+        if target is not None and migration.version > target:
+            continue
+        with write_transaction(engine) as conn:
+            if migration.version <= _applied_version(conn):
+                continue
+            migration.upgrade(conn)
+            conn.execute(
+                SchemaMigration.__table__.insert().values(
+                    version=migration.version, name=migration.name, applied_at=datetime.utcnow()
+                )
+            )
+        applied.append(migration)
+    return applied
+
+
+# --- Query plan checks ---
+# Representative versions of the queries issued by backend/main.py. Every one
+# of them must be answered through an index, never a full table scan.
+def hot_queries():
+    from backend.automation import TRANSITION_RULES
+
+    now = datetime.utcnow()
+    queries = {
+        "login": select(User).where(User.email == "user@example.com"),
+        "get_apps": select(*APPLICATION_COLUMNS).where(Application.user_id == 1).order_by(Application.updated_at.desc(), Application.id.desc()),
+        "get_apps (status, next page)": (
+            select(*APPLICATION_COLUMNS)
+            .where(Application.user_id == 1, Application.status == "pending")
+            .where(tuple_(Application.applied_date, Application.id) < tuple_(now, 1))
+            .order_by(Application.applied_date.desc(), Application.id.desc())
+        ),
+        "get_notifications": (
+            select(*NOTIFICATION_COLUMNS)
+            .where(AppNotification.user_id == 1)
+            .where(AppNotification.read == False)
+            .order_by(AppNotification.created_at.desc())
+        ),
+        "notification_history": (
+            select(*NOTIFICATION_COLUMNS)
+            .where(AppNotification.user_id == 1)
+            .where(tuple_(AppNotification.created_at, AppNotification.id) < tuple_(now, 10))
+            .order_by(AppNotification.created_at.desc(), AppNotification.id.desc())
+        ),
+        "mark_read (before)": (
+            select(AppNotification.id)
+            .where(AppNotification.user_id == 1, AppNotification.read == False, AppNotification.created_at <= now)
+        ),
+        "unread_count": select(UnreadNotificationCount.unread).where(UnreadNotificationCount.user_id == 1),
+        "notification stream catch-up": (
+            select(AppNotification)
+            .where(AppNotification.user_id == 1, AppNotification.id > 10)
+            .order_by(AppNotification.id)
+        ),
+        "get_app_metrics": select(ApplicationStatusCount).where(ApplicationStatusCount.user_id == 1),
+        "get_app_metrics (fallback)": (
+            select(Application.status, func.count()).where(Application.user_id == 1).group_by(Application.status)
+        ),
+        "get_app_timeline": (
+            select(*TIMELINE_EVENT_COLUMNS)
+            .where(ApplicationTimeline.app_id == 1)
+            .where(ApplicationTimeline.user_id == 1)
+            .order_by(ApplicationTimeline.event_time)
+        ),
+        "timeline feed (next page)": (
+            select(*TIMELINE_EVENT_COLUMNS)
+            .where(ApplicationTimeline.user_id == 1)
+            .where(tuple_(ApplicationTimeline.event_time, ApplicationTimeline.id) < tuple_(now, 10))
+            .order_by(ApplicationTimeline.event_time.desc(), ApplicationTimeline.id.desc())
+        ),
+        "timeline feed (event_type)": (
+            select(*TIMELINE_EVENT_COLUMNS)
+            .where(ApplicationTimeline.user_id == 1, ApplicationTimeline.event_type == "status-changed")
+            .order_by(ApplicationTimeline.event_time.desc(), ApplicationTimeline.id.desc())
+        ),
+        "timeline batch (app_ids)": (
+            select(*TIMELINE_EVENT_COLUMNS)
+            .where(ApplicationTimeline.user_id == 1, ApplicationTimeline.app_id.in_([1, 2, 3]))
+            .order_by(ApplicationTimeline.event_time.desc(), ApplicationTimeline.id.desc())
+        ),
+        "timeline event counts": (
+            select(ApplicationTimeline.app_id, func.count())
+            .where(ApplicationTimeline.app_id.in_([1, 2, 3]), ApplicationTimeline.user_id == 1)
+            .group_by(ApplicationTimeline.app_id)
+        ),
+        "data_version (ETag)": select(UserDataVersion.version).where(UserDataVersion.user_id == 1),
+        "cron_last_run": select(CronLog).where(CronLog.job_name == "followup_check"),
+        "automation lease": select(CronLog).where(CronLog.job_name == "automation_leader"),
+        "cron_stats": (
+            select(AutomationRun)
+            .where(AutomationRun.job_name == "followup_check")
+            .order_by(AutomationRun.started_at.desc())
+            .limit(100)
+        ),
+        "search_apps": search.hits_query("data eng", 1)[0],
+        "search_apps (load hits)": select(*APPLICATION_COLUMNS).where(Application.id.in_([1, 2, 3]), Application.user_id == 1),
+    }
+    for rule in TRANSITION_RULES:
+        queries[f"automation {rule.name}"] = select(Application.id).where(rule.predicate(now))
+        queries[f"automation {rule.name} (per user)"] = select(Application.id).where(rule.predicate(now, user_id=1))
+        queries[f"automation {rule.name} (chunk)"] = (
+            select(Application.id).where(rule.within(now, Application.user_id.in_([1, 2, 3])))
+        )
+        queries[f"automation {rule.name} (write)"] = (
+            select(Application.id).where(rule.within(now, Application.id.in_([1, 2, 3])))
+        )
+    return queries
+
+
+def explain(conn, statement) -> List[str]:
+    """Return the EXPLAIN QUERY PLAN detail lines for a SQLAlchemy statement."""
+    def _explain(conn, cursor, sql, parameters, context, executemany):
+        return "EXPLAIN QUERY PLAN " + sql, parameters
+
+    event.listen(conn, "before_cursor_execute", _explain, retval=True)
+    try:
+        return [row[-1] for row in conn.execute(statement)]
+    finally:
+        event.remove(conn, "before_cursor_execute", _explain)
+
+
+def is_full_scan(detail: str) -> bool:
+    # "SCAN x VIRTUAL TABLE INDEX ..." is an FTS5 lookup, not a table scan
+    return (
+        detail.startswith("SCAN ")
+        and " USING " not in detail
+        and " VIRTUAL TABLE INDEX " not in detail
+        and detail != "SCAN CONSTANT ROW"
+    )
+
+
+def check_query_plans(engine):
+    """Return {query name: plan lines} for every hot query that full-scans a table."""
+    failures = {}
+    with engine.connect() as conn:
+        for name, statement in hot_queries().items():
+            plan = explain(conn, statement)
+            if any(is_full_scan(detail) for detail in plan):
+                failures[name] = plan
+    return failures
+
+
+def main(argv=None):
+    from backend.db import engine, create_db_and_tables
+
+    argv = sys.argv[1:] if argv is None else argv
+    command = argv[0] if argv else "upgrade"
+
+    if command == "upgrade":
+        create_db_and_tables()
+        print(f"Schema at version {current_version(engine)}")
+    elif command == "current":
+        print(current_version(engine))
+    elif command == "check":
+        create_db_and_tables()
+        failures = check_query_plans(engine)
+        for name, plan in failures.items():
+            print(f"FULL SCAN in {name}: {' | '.join(plan)}")
+        if failures:
+            return 1
+        print(f"All {len(hot_queries())} hot queries use an index.")
+    else:
+        print(__doc__)
+        return 2
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
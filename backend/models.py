@@ -1,8 +1,24 @@
-from typing import Optional
+from typing import Dict, Optional
 from datetime import datetime
-from sqlmodel import SQLModel, Field
+from sqlalchemy import JSON, Column
+from sqlmodel import SQLModel, Field, Index
+
+APPLICATION_STATUSES = ["active", "pending", "followed-up", "not-responded", "rejected", "accepted"]
+
 
 class Application(SQLModel, table=True):
+    __table_args__ = (
+        # Per-user lookups: keyset-paginated dashboard listing (optionally by
+        # status), status counts and per-user automation runs
+        Index("ix_application_user_id_updated_at", "user_id", "updated_at"),
+        Index("ix_application_user_id_status_updated_at", "user_id", "status", "updated_at"),
+        Index("ix_application_user_id_applied_date", "user_id", "applied_date"),
+        Index("ix_application_user_id_status_applied_date", "user_id", "status", "applied_date"),
+        # Automation predicates (see backend/automation.py)
+        Index("ix_application_status_followup_date", "status", "followup_date"),
+        Index("ix_application_status_followed_up_at", "status", "followed_up_at"),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     user_id: int = Field(foreign_key="user.id")
 
@@ -17,7 +33,7 @@ class Application(SQLModel, table=True):
     applied_date: datetime
     followup_date: datetime = None
 
-    # Choices: "pending", "followed-up", "not-responded", "rejected", "accepted"
+    # Choices: see APPLICATION_STATUSES
     status: str = Field(default="pending")
     followup_method: Optional[str] = None  # e.g. "email", "portal", "LinkedIn"
 
@@ -38,10 +54,21 @@ class User(SQLModel, table=True):
 
 class CronLog(SQLModel, table=True):
     id: int = Field(default=None, primary_key=True)
-    job_name: str
+    job_name: str = Field(index=True)
     last_run: datetime
+    # Lease rows only (see backend/leases.py): who holds it and until when
+    lease_owner: Optional[str] = None
+    lease_expires_at: Optional[datetime] = None
+    # Last user id written by an unfinished chunked pass (see backend/automation.py)
+    checkpoint: Optional[int] = None
 
 class AppNotification(SQLModel, table=True):
+    __table_args__ = (
+        Index("ix_appnotification_user_id_read_created_at", "user_id", "read", "created_at"),
+        # Paginated notification history
+        Index("ix_appnotification_user_id_created_at", "user_id", "created_at"),
+    )
+
     id: int = Field(default=None, primary_key=True)
     app_id: int
     user_id: int
@@ -51,6 +78,13 @@ class AppNotification(SQLModel, table=True):
 
 
 class ApplicationTimeline(SQLModel, table=True):
+    __table_args__ = (
+        Index("ix_applicationtimeline_app_id_user_id_event_time", "app_id", "user_id", "event_time"),
+        # User-wide activity feed, optionally by event type
+        Index("ix_applicationtimeline_user_id_event_time", "user_id", "event_time"),
+        Index("ix_applicationtimeline_user_id_event_type_event_time", "user_id", "event_type", "event_time"),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     app_id: int = Field(foreign_key="application.id")
     user_id: int = Field(foreign_key="user.id")
@@ -58,5 +92,52 @@ class ApplicationTimeline(SQLModel, table=True):
     event_type: str                                   # e.g. 'status-changed'
     old_status: Optional[str] = None
     new_status: Optional[str] = None
-    notes: Optional[str] = None  
+    notes: Optional[str] = None
+
+
+class SchemaMigration(SQLModel, table=True):
+    # One row per applied step from backend/migrations.py
+    version: int = Field(primary_key=True)
+    name: str
+    applied_at: datetime = Field(default_factory=datetime.utcnow)
+
 
+class ApplicationStatusCount(SQLModel, table=True):
+    # Per-user application counts by status, maintained by triggers on the
+    # application table (see backend/counters.py)
+    user_id: int = Field(primary_key=True)
+    status: str = Field(primary_key=True)
+    count: int = Field(default=0)
+
+
+class UnreadNotificationCount(SQLModel, table=True):
+    # Maintained by triggers on appnotification (see backend/counters.py)
+    user_id: int = Field(primary_key=True)
+    unread: int = Field(default=0)
+
+
+class UserDataVersion(SQLModel, table=True):
+    # Bumped by triggers on every write to a user's applications,
+    # notifications or timeline; the basis of the API's ETags (backend/etags.py)
+    user_id: int = Field(primary_key=True)
+    version: int = Field(default=0)
+
+
+class AutomationRun(SQLModel, table=True):
+    # One row per full automation pass, kept for GET /cron/stats (backend/runs.py)
+    __table_args__ = (
+        Index("ix_automationrun_job_name_started_at", "job_name", "started_at"),
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    job_name: str
+    started_at: datetime
+    # Unset while the pass is running, or if it died without recording an error
+    finished_at: Optional[datetime] = None
+    duration_ms: Optional[float] = None
+    chunks: int = Field(default=0)
+    rows_scanned: int = Field(default=0)
+    # {rule name: applications moved}
+    transitions: Dict[str, int] = Field(default_factory=dict, sa_column=Column(JSON, nullable=False))
+    notifications_created: int = Field(default=0)
+    error: Optional[str] = None
@@ -0,0 +1,84 @@
+"""
+Keyset pagination for the list endpoints.
+
+Pages are ordered by (sort column, id) and the next page starts strictly after
+the last row of the previous one, so a page costs one index range read no
+matter how deep the client has paged. The cursor handed to clients is opaque:
+url-safe base64 of [sort column name, sort value, id].
+"""
+
+import base64
+import json
+from datetime import datetime
+from typing import Optional
+
+from fastapi import HTTPException
+from sqlalchemy import DateTime, Float, Integer, tuple_
+
+
+def encode_cursor(column_name: str, sort_value, last_id: int) -> str:
+    if isinstance(sort_value, datetime):
+        sort_value = sort_value.isoformat()
+    raw = json.dumps([column_name, sort_value, last_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort_column):
+    """Return (sort value, id) from a cursor, or raise 400 if it is malformed or for another sort."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        column_name, sort_value, last_id = json.loads(raw)
+        if column_name != sort_column.key or not isinstance(last_id, int) or isinstance(last_id, bool):
+            raise ValueError(cursor)
+        if isinstance(sort_column.type, (Float, Integer)) and (
+            isinstance(sort_value, bool) or not isinstance(sort_value, (int, float))
+        ):
+            raise ValueError(cursor)
+        if sort_value is not None and isinstance(sort_column.type, DateTime):
+            sort_value = datetime.fromisoformat(sort_value)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return sort_value, last_id
+
+
+def parse_sort(sort: str, allowed: dict):
+    """
+    Turn "field" / "-field" into (column, descending). Raises 400 for unknown fields.
+    """
+    descending = sort.startswith("-")
+    column = allowed.get(sort.lstrip("-"))
+    if column is None:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported sort '{sort}'. Use one of: {', '.join(sorted(allowed))} (prefix '-' for descending)",
+        )
+    return column, descending
+
+
+def paginate(session, query, sort_column, id_column, limit: int, cursor: Optional[str] = None, descending: bool = True):
+    """
+    Apply keyset ordering to `query` and return (rows, next_cursor).
+
+    `next_cursor` is None on the last page.
+    """
+    if cursor:
+        sort_value, last_id = decode_cursor(cursor, sort_column)
+        # Row-value comparison so SQLite can seek the index instead of filtering
+        position = tuple_(sort_column, id_column)
+        if descending:
+            query = query.where(position < tuple_(sort_value, last_id))
+        else:
+            query = query.where(position > tuple_(sort_value, last_id))
+
+    if descending:
+        query = query.order_by(sort_column.desc(), id_column.desc())
+    else:
+        query = query.order_by(sort_column.asc(), id_column.asc())
+
+    rows = session.exec(query.limit(limit + 1)).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(sort_column.key, getattr(last, sort_column.key), getattr(last, id_column.key))
+    return rows, next_cursor
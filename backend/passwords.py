@@ -0,0 +1,90 @@
+"""
+Password hashing off the request threadpool.
+
+bcrypt is deliberately slow, so /signup, /login and PUT /me hand it to a small
+dedicated executor instead of the threadpool the other endpoints share. A
+login storm then saturates only these workers; once PASSWORD_HASH_WORKERS
+jobs are running and PASSWORD_HASH_QUEUE more are waiting, further requests
+are turned away at once with 503 and Retry-After instead of queueing behind
+them.
+
+The cost factor comes from BCRYPT_ROUNDS. Hashes made with any other cost are
+re-hashed on the next successful login, so changing the setting migrates
+accounts as their owners sign in.
+"""
+
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+
+from dotenv import load_dotenv
+from fastapi import HTTPException
+from passlib.context import CryptContext
+
+load_dotenv()
+
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+PASSWORD_HASH_QUEUE = int(os.getenv("PASSWORD_HASH_QUEUE", "32"))
+RETRY_AFTER_SECONDS = 1
+
+# min == max == default, so any hash with a different cost "needs update"
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=BCRYPT_ROUNDS,
+    bcrypt__min_rounds=BCRYPT_ROUNDS,
+    bcrypt__max_rounds=BCRYPT_ROUNDS,
+)
+
+_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="bcrypt")
+_lock = threading.Lock()
+_in_flight = 0
+
+
+def in_flight() -> int:
+    """Hashing jobs running or waiting for a worker."""
+    return _in_flight
+
+
+def _release(_future):
+    global _in_flight
+    with _lock:
+        _in_flight -= 1
+
+
+async def _run(fn, *args):
+    global _in_flight
+    with _lock:
+        if _in_flight >= PASSWORD_HASH_WORKERS + PASSWORD_HASH_QUEUE:
+            raise HTTPException(
+                status_code=503,
+                detail="Too many sign-in requests, please retry shortly",
+                headers={"Retry-After": str(RETRY_AFTER_SECONDS)},
+            )
+        _in_flight += 1
+    # Released when the job finishes, not when the request goes away, so a
+    # disconnected client's hash still counts against the queue while it runs
+    future = _executor.submit(fn, *args)
+    future.add_done_callback(_release)
+    return await asyncio.wrap_future(future)
+
+
+async def hash_password(password: str) -> str:
+    return await _run(pwd_context.hash, password)
+
+
+async def verify_password(password: str, password_hash: str) -> Tuple[bool, Optional[str]]:
+    """
+    Check `password` against `password_hash`.
+
+    Returns (valid, new_hash); new_hash is set when the stored hash was made
+    with a different cost and should be replaced.
+    """
+    return await _run(pwd_context.verify_and_update, password, password_hash)
+
+
+def shutdown():
+    _executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,236 @@
+"""
+Per-request SQL statement accounting.
+
+`install(engine)` adds before/after_cursor_execute hooks that charge every
+statement, and the time the driver spent on it, to the QueryStats of the
+request being served. MetricsMiddleware (backend/instrumentation.py) starts
+one per request in a context variable; the threadpool and the async
+engine's greenlets run with a copy of the request's context, so statements
+from sync and async endpoints alike land on it. Outside a request (the
+scheduler, CLIs) the hooks do nothing beyond one context variable lookup.
+
+The middleware reports the totals in a Server-Timing header
+(`db;dur=<ms>;desc="<n> queries"`) and in the metrics, and logs a warning
+when one statement runs QUERY_REPEAT_WARNING times or more in a request,
+the usual sign of a per-row query in a loop (N+1).
+
+Query budgets keep it that way:
+    python -m backend.querystats check
+drives each endpoint in QUERY_BUDGETS against a scratch database, for an
+account with one application, notification and timeline event and for one
+with several of each, and fails if one runs more statements than budgeted
+or a different number for the two (a statement per row). `assert_query_budget`
+checks a budget inside a test.
+"""
+
+import os
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+
+QUERY_REPEAT_WARNING = int(os.getenv("QUERY_REPEAT_WARNING", "10"))
+
+
+@dataclass
+class QueryStats:
+    count: int = 0
+    seconds: float = 0.0
+    # Statement text -> executions
+    statements: Dict[str, int] = field(default_factory=dict)
+
+    def most_repeated(self) -> Tuple[Optional[str], int]:
+        if not self.statements:
+            return None, 0
+        statement = max(self.statements, key=self.statements.get)
+        return statement, self.statements[statement]
+
+    def server_timing(self) -> str:
+        return f'db;dur={self.seconds * 1000:.2f};desc="{self.count} queries"'
+
+
+_current: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+def begin() -> Tuple[QueryStats, object]:
+    """Start accounting for the current request; pass the token to end()."""
+    stats = QueryStats()
+    return stats, _current.set(stats)
+
+
+def end(token):
+    _current.reset(token)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        context._query_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    if stats is None or not hasattr(context, "_query_started"):
+        return
+    stats.count += 1
+    stats.seconds += time.perf_counter() - context._query_started
+    stats.statements[statement] = stats.statements.get(statement, 0) + 1
+
+
+def install(engine):
+    """Charge statements run through `engine` (a sync Engine) to the current request."""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+@contextmanager
+def request_statements(engines=None):
+    """
+    Collect the statements that requests run on `engines` (default: the
+    app's engines) during the block, from whichever thread serves them.
+    Statements outside a request, such as the scheduler's, are left out.
+    """
+    if engines is None:
+        from backend import db
+        engines = [db.engine] + ([db.async_engine.sync_engine] if db.async_engine else [])
+    statements: List[str] = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if _current.get() is not None:
+            statements.append(statement)
+
+    for engine in engines:
+        event.listen(engine, "after_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        for engine in engines:
+            event.remove(engine, "after_cursor_execute", record)
+
+
+@contextmanager
+def assert_query_budget(budget: int, engines=None):
+    """
+    Fail with AssertionError if the requests made in the block run more than
+    `budget` statements between them:
+
+        with assert_query_budget(3):
+            client.get("/apps", headers=auth)
+    """
+    with request_statements(engines) as statements:
+        yield statements
+    if len(statements) > budget:
+        listing = "\n".join(f"  {' '.join(statement.split())[:160]}" for statement in statements)
+        raise AssertionError(f"{len(statements)} statements, budget {budget}:\n{listing}")
+
+
+# --- Query budgets ---
+# Statements per request for the endpoints a dashboard hits, as measured on
+# the requests check_budgets makes (authentication reads the token only). A
+# request that runs more fails the check below, and so does one whose count
+# differs between an account with one row of everything and one with
+# BUDGET_SEED_ROWS: budgets are constants, not per-row allowances.
+BUDGET_SEED_ROWS = 5
+QUERY_BUDGETS = {
+    "GET /me": 0,
+    "GET /apps": 3,
+    "GET /apps?status=active&sort=applied_date": 3,
+    "GET /apps/search?q=acme": 3,
+    "GET /apps/export": 1,
+    "GET /apps/{app_id}/timeline": 2,
+    "GET /timeline": 2,
+    "GET /metrics": 2,
+    "GET /notifications": 2,
+    "GET /notifications/unread-count": 1,
+    "GET /notifications/history": 1,
+    "PUT /apps/{app_id}": 3,
+    "POST /apps": 2,
+}
+
+
+def check_budgets(client, headers, app_id: int) -> List[Tuple[str, int, int]]:
+    """Run every budgeted request through `client`; returns (request, statements, budget)."""
+    results = []
+    for name, budget in QUERY_BUDGETS.items():
+        method, path = name.split(" ", 1)
+        path = path.replace("{app_id}", str(app_id))
+        body = {"notes": "budget check"} if method == "PUT" else None
+        if method == "POST":
+            body = {
+                "company_name": "Budget", "role_title": "Engineer", "city": "Remote", "country": "India",
+                "applied_date": "2026-01-01T00:00:00", "followup_date": "2026-02-01T00:00:00",
+            }
+        with request_statements() as statements:
+            response = client.request(method, path, headers=headers, json=body)
+        if response.status_code >= 400:
+            raise RuntimeError(f"{name} returned {response.status_code}: {response.text}")
+        results.append((name, len(statements), budget))
+    return results
+
+
+def seed(client, email: str, rows: int) -> Tuple[dict, int]:
+    """
+    An account with `rows` "Acme" applications, each with a notification and
+    two timeline events (the automation's and a manual status change).
+    Returns its auth headers and the id of one of the applications.
+    """
+    credentials = {"email": email, "password": "BudgetCheck1"}
+    client.post("/signup", json={**credentials, "name": "Budget"})
+    headers = {"Authorization": f"Bearer {client.post('/login', json=credentials).json()['token']}"}
+    overdue = datetime.utcnow() - timedelta(days=1)
+    app_ids = [
+        client.post("/apps", headers=headers, json={
+            "company_name": f"Acme {n}", "role_title": "Engineer", "city": "Remote", "country": "India",
+            "applied_date": "2026-01-01T00:00:00", "followup_date": overdue.isoformat(), "status": "active",
+        }).json()["id"]
+        for n in range(rows)
+    ]
+    # Moves them all to pending, with a notification and a timeline event each
+    client.post("/automation/run-now", headers=headers)
+    for app_id in app_ids:
+        client.put(f"/apps/{app_id}", headers=headers, json={"status": "followed-up"})
+    return headers, app_ids[0]
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv != ["check"]:
+        print(__doc__)
+        return 2
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # The app's engine reads DATABASE_URL at import
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'budgets.db')}"
+        from fastapi.testclient import TestClient
+        from backend.main import app
+
+        with TestClient(app) as client:
+            # A statement run per row shows as a count that grows with the rows
+            one = check_budgets(client, *seed(client, "one@example.com", 1))
+            many = check_budgets(client, *seed(client, "many@example.com", BUDGET_SEED_ROWS))
+
+    failures = 0
+    for (name, single, budget), (_, count, _) in zip(one, many):
+        problem = ""
+        if max(single, count) > budget:
+            problem = "over budget"
+        elif count != single:
+            problem = f"grows with rows ({single} with 1 row of each)"
+        failures += bool(problem)
+        print(f"{'FAIL ' if problem else 'ok   '} {name:<48} {count:>3} / {budget}  {problem}")
+    if failures:
+        print(f"{failures} endpoint(s) over their query budget or running statements per row.")
+        return 1
+    print(f"All {len(many)} endpoints within their query budgets, whatever the number of rows.")
+    return 0
+
+
+if __name__ == "__main__":
+    # Run as backend.querystats, the module the middleware sets the context variable of
+    from backend.querystats import main
+    sys.exit(main())
@@ -0,0 +1,144 @@
+"""
+History of full automation passes, behind GET /cron/stats.
+
+Each full pass adds an AutomationRun row as it starts and fills it in as it
+ends: duration, chunks, rows scanned (candidate applications evaluated),
+applications moved per rule, notifications created, and the error if it
+failed. A row left without `finished_at` is a pass still running, or one
+whose process died. Only the newest AUTOMATION_HISTORY_LIMIT rows per job are
+kept; older ones are deleted as each pass finishes.
+
+`summary` reduces the recent history to what alerting needs: duration
+percentiles, the trend between the older and newer half of the window, and
+error counts.
+"""
+
+import math
+import os
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy import delete
+from sqlmodel import Session, select
+
+from backend.models import AutomationRun
+
+AUTOMATION_HISTORY_LIMIT = int(os.getenv("AUTOMATION_HISTORY_LIMIT", "1000"))
+
+
+@dataclass
+class RunStats:
+    chunks: int = 0
+    rows_scanned: int = 0
+    notifications_created: int = 0
+    transitions: Dict[str, int] = field(default_factory=dict)
+
+
+def start_run(engine, job_name: str, started_at: datetime) -> int:
+    with Session(engine) as session:
+        run = AutomationRun(job_name=job_name, started_at=started_at)
+        session.add(run)
+        session.commit()
+        return run.id
+
+
+def finish_run(engine, run_id: int, stats: RunStats, duration_ms: float, error: Optional[str] = None):
+    """Record the outcome of a run and prune the history of its job."""
+    with Session(engine) as session:
+        run = session.get(AutomationRun, run_id)
+        run.finished_at = datetime.utcnow()
+        run.duration_ms = round(duration_ms, 3)
+        run.chunks = stats.chunks
+        run.rows_scanned = stats.rows_scanned
+        run.transitions = dict(stats.transitions)
+        run.notifications_created = stats.notifications_created
+        run.error = error
+        session.add(run)
+        prune(session, run.job_name)
+        session.commit()
+
+
+def prune(session: Session, job_name: str, keep: int = AUTOMATION_HISTORY_LIMIT):
+    """Delete all but the newest `keep` runs of a job."""
+    oldest_kept = session.exec(
+        select(AutomationRun.started_at)
+        .where(AutomationRun.job_name == job_name)
+        .order_by(AutomationRun.started_at.desc())
+        .offset(keep - 1)
+        .limit(1)
+    ).first()
+    if oldest_kept is not None:
+        session.exec(
+            delete(AutomationRun).where(AutomationRun.job_name == job_name, AutomationRun.started_at < oldest_kept)
+        )
+
+
+def percentile(ordered: List[float], q: float) -> Optional[float]:
+    """Nearest-rank percentile of an already sorted list."""
+    if not ordered:
+        return None
+    return ordered[max(0, math.ceil(q * len(ordered)) - 1)]
+
+
+def _duration_stats(durations: List[float]) -> dict:
+    ordered = sorted(durations)
+    return {
+        "p50": percentile(ordered, 0.50),
+        "p95": percentile(ordered, 0.95),
+        "max": ordered[-1] if ordered else None,
+    }
+
+
+def summary(session: Session, job_name: str, window: int = 100) -> dict:
+    """
+    Statistics over the newest `window` runs of a job.
+
+    The trend compares the median duration of the newer half of the window
+    with that of the older half; a steadily positive `change_pct` means
+    passes are slowing down.
+    """
+    runs = session.exec(
+        select(AutomationRun)
+        .where(AutomationRun.job_name == job_name)
+        .order_by(AutomationRun.started_at.desc())
+        .limit(window)
+    ).all()
+    finished = [run for run in reversed(runs) if run.finished_at is not None]
+    durations = [run.duration_ms for run in finished]
+
+    older, newer = durations[:len(durations) // 2], durations[len(durations) // 2:]
+    older_p50, newer_p50 = percentile(sorted(older), 0.5), percentile(sorted(newer), 0.5)
+    change_pct = None
+    if older_p50 and newer_p50 is not None:
+        change_pct = round((newer_p50 - older_p50) / older_p50 * 100, 1)
+
+    last = finished[-1] if finished else None
+    return {
+        "job_name": job_name,
+        "runs": len(finished),
+        "errors": sum(1 for run in finished if run.error),
+        "running_since": runs[0].started_at.isoformat() if runs and runs[0].finished_at is None else None,
+        "duration_ms": _duration_stats(durations),
+        "trend": {"previous_p50_ms": older_p50, "recent_p50_ms": newer_p50, "change_pct": change_pct},
+        "rows_scanned": sum(run.rows_scanned for run in finished),
+        "transitions": _totals(run.transitions for run in finished),
+        "notifications_created": sum(run.notifications_created for run in finished),
+        "last_run": {
+            "started_at": last.started_at.isoformat(),
+            "duration_ms": last.duration_ms,
+            "chunks": last.chunks,
+            "rows_scanned": last.rows_scanned,
+            "transitions": last.transitions,
+            "notifications_created": last.notifications_created,
+            "error": last.error,
+        } if last else None,
+    }
+
+
+def _totals(per_run) -> Dict[str, int]:
+    totals: Dict[str, int] = {}
+    for transitions in per_run:
+        for name, count in transitions.items():
+            totals[name] = totals.get(name, 0) + count
+    return totals
@@ -0,0 +1,143 @@
+"""
+Due-time scheduling of the follow-up automation.
+
+Instead of polling, the scheduler holds one APScheduler date job set for the
+moment the earliest pending transition becomes due (see
+automation.next_due_time). When it fires, the automation pass runs and the job
+is re-armed for the next deadline; with nothing pending there is no job at
+all. Endpoints that create or change applications call `consider()` with the
+row's own deadline, which pulls the job forward when that deadline is sooner.
+
+With several API workers only one of them runs the automation: every worker
+tries to take or renew the automation lease (backend/leases.py) each
+AUTOMATION_HEARTBEAT_SECONDS, and only the holder arms the date job. The
+holder also re-reads the earliest deadline on each heartbeat, one indexed MIN
+per rule, which picks up rows written by other workers or outside the API.
+When it stops renewing, another worker takes over once the lease expires.
+"""
+
+import logging
+import os
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Optional
+
+from apscheduler.schedulers.background import BackgroundScheduler
+from sqlmodel import Session
+
+from backend.automation import due_time, next_due_time
+from backend.leases import AUTOMATION_LEASE_SECONDS, Lease
+
+logger = logging.getLogger(__name__)
+
+FOLLOWUP_JOB_ID = "followup_check"
+HEARTBEAT_JOB_ID = "automation_heartbeat"
+# Renew well within the lease, so one slow heartbeat does not cost it
+AUTOMATION_HEARTBEAT_SECONDS = int(
+    os.getenv("AUTOMATION_HEARTBEAT_SECONDS", str(max(1, AUTOMATION_LEASE_SECONDS // 3)))
+)
+
+# Floor between passes, so a rule that cannot make progress cannot spin and
+# a stream of writes to overdue applications cannot start a pass each
+MIN_RUN_INTERVAL = timedelta(seconds=1)
+
+
+class FollowupScheduler:
+    def __init__(self, engine, run_pass: Callable[[], object], lease: Optional[Lease] = None):
+        self.engine = engine
+        self.run_pass = run_pass
+        self.lease = lease or Lease(engine)
+        self.is_leader = False
+        self._scheduler: Optional[BackgroundScheduler] = None
+        self._lock = threading.Lock()
+        self._armed_for: Optional[datetime] = None
+        # Start of the last pass, for the MIN_RUN_INTERVAL floor
+        self._last_started: Optional[datetime] = None
+
+    @property
+    def next_run(self) -> Optional[datetime]:
+        return self._armed_for
+
+    def start(self):
+        self._scheduler = BackgroundScheduler(timezone=timezone.utc)
+        self._scheduler.add_job(self.heartbeat, "interval", seconds=AUTOMATION_HEARTBEAT_SECONDS, id=HEARTBEAT_JOB_ID)
+        self._scheduler.start()
+        self.heartbeat()
+
+    def shutdown(self):
+        # Detach first: a pass finishing during shutdown must not re-arm, as
+        # APScheduler holds its job store lock while waiting for that pass
+        with self._lock:
+            scheduler, self._scheduler = self._scheduler, None
+        if scheduler:
+            scheduler.shutdown()
+        if self.is_leader:
+            self.lease.release()
+            self.is_leader = False
+
+    def _arm(self, when: Optional[datetime], only_if_sooner: bool = False):
+        with self._lock:
+            if self._scheduler is None:
+                return
+            if when is None or not self.is_leader:
+                if self._scheduler.get_job(FOLLOWUP_JOB_ID):
+                    self._scheduler.remove_job(FOLLOWUP_JOB_ID)
+                self._armed_for = None
+                return
+            if self._last_started is not None:
+                # Also for deadlines already past, which consider() sees on every overdue write
+                when = max(when, self._last_started + MIN_RUN_INTERVAL)
+            if only_if_sooner and self._armed_for is not None and when >= self._armed_for:
+                return
+            # Naive datetimes are UTC throughout the app
+            run_date = max(when, datetime.utcnow()).replace(tzinfo=timezone.utc)
+            self._scheduler.add_job(
+                self._fire, "date", run_date=run_date, id=FOLLOWUP_JOB_ID,
+                replace_existing=True, misfire_grace_time=None,
+            )
+            self._armed_for = when
+
+    def _renew(self) -> bool:
+        """Take or renew the lease; disarm if it is held elsewhere."""
+        was_leader = self.is_leader
+        self.is_leader = self.lease.acquire()
+        if self.is_leader != was_leader:
+            logger.info(f"Automation lease {'acquired' if self.is_leader else 'lost'} by {self.lease.owner}")
+        if not self.is_leader:
+            self._arm(None)
+        return self.is_leader
+
+    def heartbeat(self):
+        if self._renew():
+            self.resync()
+
+    def consider(self, app):
+        """Pull the next run forward if `app` becomes due before it. No database work."""
+        when = due_time(app)
+        if when is not None and self.is_leader:
+            self._arm(when, only_if_sooner=True)
+
+    def resync(self, session: Optional[Session] = None):
+        """Re-arm for the earliest deadline in the database. Pass a session to reuse it."""
+        if not self.is_leader:
+            return
+        if session is None:
+            with Session(self.engine) as session:
+                when = next_due_time(session)
+        else:
+            when = next_due_time(session)
+        self._arm(when)
+
+    def _fire(self):
+        # A paused worker may have lost the lease since the job was armed
+        if not self._renew():
+            return
+        self._last_started = datetime.utcnow()
+        try:
+            self.run_pass()
+        finally:
+            with Session(self.engine) as session:
+                when = next_due_time(session)
+            self._arm(when)
+            armed = self._armed_for
+            logger.info(f"Next follow-up check: {armed.isoformat() if armed else 'nothing pending'}")
@@ -0,0 +1,88 @@
+"""
+Response models: the fields each endpoint returns, and nothing more.
+
+Endpoints declare these as their response_model, so the OpenAPI schema
+documents what clients actually get and a column added to a table does not
+leak into responses. None of them carries user_id: every row a user is
+shown is their own.
+
+List endpoints select exactly these columns (`columns_of`) instead of whole
+ORM entities, so a page is read as plain rows and handed to the response
+model without hydrating a model instance per row. FastAPI validates and
+serializes it in pydantic-core and ORJSONResponse (the app's default
+response class) encodes it; `python -m backend.benchmarks.bench_serialization`
+compares that with the old path.
+"""
+
+from datetime import datetime
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+from backend.models import Application, AppNotification, ApplicationTimeline
+
+
+def columns_of(model, table) -> list:
+    """The columns of `table` (a SQLModel table class) named by the fields of `model`, in field order."""
+    columns = table.__table__.columns
+    return [columns[name] for name in model.model_fields if name in columns]
+
+
+class ApplicationOut(BaseModel):
+    id: int
+    company_name: str
+    role_title: str
+    city: str
+    country: str
+    salary: Optional[str] = None
+    applied_date: datetime
+    followup_date: Optional[datetime] = None
+    status: str
+    followup_method: Optional[str] = None
+    followed_up_at: Optional[datetime] = None
+    notes: Optional[str] = None
+    updated_at: datetime
+
+
+class ApplicationItem(ApplicationOut):
+    # Timeline events of the application (see backend/timeline.py)
+    event_count: int
+
+
+class ApplicationPage(BaseModel):
+    items: List[ApplicationItem]
+    next_cursor: Optional[str] = None
+
+
+class NotificationOut(BaseModel):
+    id: int
+    app_id: int
+    message: str
+    created_at: datetime
+    read: bool
+
+
+class NotificationPage(BaseModel):
+    items: List[NotificationOut]
+    next_cursor: Optional[str] = None
+
+
+class TimelineEventOut(BaseModel):
+    id: int
+    app_id: int
+    event_time: datetime
+    event_type: str
+    old_status: Optional[str] = None
+    new_status: Optional[str] = None
+    notes: Optional[str] = None
+
+
+class TimelinePage(BaseModel):
+    items: List[TimelineEventOut]
+    next_cursor: Optional[str] = None
+
+
+# What the list endpoints select
+APPLICATION_COLUMNS = columns_of(ApplicationOut, Application)
+NOTIFICATION_COLUMNS = columns_of(NotificationOut, AppNotification)
+TIMELINE_EVENT_COLUMNS = columns_of(TimelineEventOut, ApplicationTimeline)
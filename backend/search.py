@@ -0,0 +1,244 @@
+"""
+Full-text search over applications with SQLite FTS5.
+
+`application_fts` is a contentless FTS5 index of the application text columns
+(the text itself stays in `application`). Triggers keep it in step with every
+insert, delete and update of those columns, from the API, bulk imports or
+anything else; status-only updates by the automation leave it alone.
+
+Each entry's rowid is `user_id << 32 | application id`, so one user's
+applications occupy one contiguous rowid range. A search is a MATCH bounded to
+that range, which FTS5 answers by seeking into each term's posting list rather
+than reading every user's matches. Ranking is done here over the user's own
+hits, BM25-style with per-column weights: FTS5's bm25() would first count each
+term across the whole table, which dominates the cost once a word is common.
+
+Many small writes leave the index in many segments, which slows prefix terms
+down. FTS5 merges them incrementally; after mass updates run
+    python -m backend.search optimize
+"""
+
+import re
+import sys
+import unicodedata
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import Float, column, text
+from sqlmodel import select
+
+from backend.models import Application
+from backend.pagination import decode_cursor, encode_cursor
+from backend.schemas import APPLICATION_COLUMNS
+
+# Indexed columns and their ranking weights: company and role matter most
+COLUMN_WEIGHTS = {
+    "company_name": 10.0,
+    "role_title": 8.0,
+    "city": 3.0,
+    "country": 2.0,
+    "notes": 1.0,
+}
+TEXT_COLUMNS = list(COLUMN_WEIGHTS)
+
+USER_SHIFT = 32
+# Hits ranked per search. Beyond this (a user with thousands of matching
+# applications) the most recently added matches are ranked and older ones
+# are left out of the results.
+MAX_CANDIDATES = 2000
+
+_columns = ", ".join(TEXT_COLUMNS)
+_new = ", ".join(f"NEW.{name}" for name in TEXT_COLUMNS)
+_old = ", ".join(f"OLD.{name}" for name in TEXT_COLUMNS)
+_new_rowid = f"(NEW.user_id << {USER_SHIFT}) | NEW.id"
+_old_rowid = f"(OLD.user_id << {USER_SHIFT}) | OLD.id"
+
+FTS_TABLE = f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS application_fts USING fts5(
+        {_columns},
+        content='', tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )
+"""
+
+TRIGGERS = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_application_fts_insert
+    AFTER INSERT ON application
+    BEGIN
+        INSERT INTO application_fts (rowid, {_columns}) VALUES ({_new_rowid}, {_new});
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_application_fts_delete
+    AFTER DELETE ON application
+    BEGIN
+        INSERT INTO application_fts (application_fts, rowid, {_columns}) VALUES ('delete', {_old_rowid}, {_old});
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_application_fts_update
+    AFTER UPDATE OF user_id, {_columns} ON application
+    BEGIN
+        INSERT INTO application_fts (application_fts, rowid, {_columns}) VALUES ('delete', {_old_rowid}, {_old});
+        INSERT INTO application_fts (rowid, {_columns}) VALUES ({_new_rowid}, {_new});
+    END
+    """,
+]
+
+
+def install(conn):
+    """Create the FTS index and its triggers, and index every existing application."""
+    conn.exec_driver_sql(FTS_TABLE)
+    for ddl in TRIGGERS:
+        conn.exec_driver_sql(ddl)
+    conn.exec_driver_sql("INSERT INTO application_fts (application_fts) VALUES ('delete-all')")
+    conn.exec_driver_sql(
+        f"INSERT INTO application_fts (rowid, {_columns}) "
+        f"SELECT (user_id << {USER_SHIFT}) | id, {_columns} FROM application"
+    )
+    optimize(conn)
+
+
+def optimize(conn):
+    """Merge the whole index into one segment."""
+    conn.exec_driver_sql("INSERT INTO application_fts (application_fts) VALUES ('optimize')")
+
+
+_WORD = re.compile(r"[^\W_]+")
+
+# Cursor key; only its name and type matter to the pagination helpers
+SCORE = column("score", Float)
+
+_HITS = text(
+    "SELECT rowid FROM application_fts "
+    "WHERE application_fts MATCH :match AND rowid BETWEEN :low AND :high "
+    "ORDER BY rowid DESC LIMIT :limit"
+)
+
+
+def _fold(value: str) -> str:
+    # Same folding as unicode61 with remove_diacritics: lowercase, accents dropped
+    if value.isascii():
+        return value.lower()
+    decomposed = unicodedata.normalize("NFKD", value.lower())
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+# Cities, countries and roles repeat across a user's applications
+@lru_cache(maxsize=4096)
+def tokenize(value: Optional[str]) -> Tuple[str, ...]:
+    """Split text into words the way the unicode61 tokenizer does."""
+    return tuple(_WORD.findall(_fold(value))) if value else ()
+
+
+def match_expression(q: str) -> Tuple[str, List[str]]:
+    """
+    Turn free text into an FTS5 query: every word must match in some indexed
+    column, the last one as a prefix (search as you type). Words are quoted,
+    so FTS5 syntax in user input is never interpreted.
+
+    Returns (expression, folded words).
+    """
+    words = list(tokenize(q))
+    if not words:
+        raise HTTPException(status_code=400, detail="Search query must contain at least one word")
+    terms = [f'"{word}"' for word in words[:-1]] + [f'"{words[-1]}"*']
+    return " ".join(terms), words
+
+
+def user_rowid_range(user_id: int) -> Tuple[int, int]:
+    low = int(user_id) << USER_SHIFT
+    return low, low + (1 << USER_SHIFT) - 1
+
+
+def hits_query(q: str, user_id: int):
+    """The FTS statement for the user's matches of `q`, and the query words."""
+    expression, words = match_expression(q)
+    low, high = user_rowid_range(user_id)
+    return _HITS.bindparams(match=expression, low=low, high=high, limit=MAX_CANDIDATES), words
+
+
+def hit_ids(session, q: str, user_id: int) -> Tuple[List[int], List[str]]:
+    """
+    Ids of the user's applications matching `q`, and the query words. At
+    most MAX_CANDIDATES of them: the most recently added, as ids grow.
+    """
+    statement, words = hits_query(q, user_id)
+    rows = session.exec(statement).all()
+    mask = (1 << USER_SHIFT) - 1
+    return [rowid & mask for rowid, in rows], words
+
+
+def score(apps, words: List[str], k1: float = 1.2, b: float = 0.75) -> Dict[int, float]:
+    """
+    BM25-style relevance of each hit: per word and column, a term frequency
+    that saturates (k1) and is normalised by the column's length relative to
+    its average over the hits (b), times the column weight. The last word
+    counts as a prefix, as in the query. Word rarity is left out: every hit
+    contains every word.
+    """
+    tokens = {app.id: {name: tokenize(getattr(app, name)) for name in TEXT_COLUMNS} for app in apps}
+    average = {
+        name: (sum(len(columns[name]) for columns in tokens.values()) / len(tokens)) or 1.0
+        for name in TEXT_COLUMNS
+    } if tokens else {}
+
+    scores = {}
+    for app_id, columns in tokens.items():
+        total = 0.0
+        for position, word in enumerate(words):
+            is_prefix = position == len(words) - 1
+            for name, weight in COLUMN_WEIGHTS.items():
+                column_tokens = columns[name]
+                tf = sum(1 for token in column_tokens if token == word or (is_prefix and token.startswith(word)))
+                if tf:
+                    norm = 1 - b + b * len(column_tokens) / average[name]
+                    total += weight * tf * (k1 + 1) / (tf + k1 * norm)
+        scores[app_id] = round(total, 6)
+    return scores
+
+
+def search(session, q: str, user_id: int, limit: int, cursor: Optional[str] = None, status: Optional[str] = None):
+    """
+    One page of the user's applications matching `q`, best match first, as
+    rows of APPLICATION_COLUMNS. Returns (rows, next_cursor) like
+    backend.pagination.paginate.
+    """
+    ids, words = hit_ids(session, q, user_id)
+    if not ids:
+        return [], None
+    query = select(*APPLICATION_COLUMNS).where(Application.id.in_(ids), Application.user_id == user_id)
+    if status:
+        query = query.where(Application.status == status)
+    apps = session.exec(query).all()
+
+    scores = score(apps, words)
+    ranked = sorted(apps, key=lambda app: (-scores[app.id], app.id))
+    if cursor:
+        last_score, last_id = decode_cursor(cursor, SCORE)
+        ranked = [app for app in ranked if (-scores[app.id], app.id) > (-last_score, last_id)]
+
+    next_cursor = None
+    if len(ranked) > limit:
+        ranked = ranked[:limit]
+        last = ranked[-1]
+        next_cursor = encode_cursor(SCORE.key, scores[last.id], last.id)
+    return ranked, next_cursor
+
+
+def main(argv=None):
+    from backend.db import engine
+
+    argv = sys.argv[1:] if argv is None else argv
+    if argv != ["optimize"]:
+        print(__doc__)
+        return 2
+    with engine.begin() as conn:
+        optimize(conn)
+    print("Search index optimized.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,60 @@
+"""
+Timeline queries shared by GET /timeline and the application list endpoints.
+
+GET /timeline is the user's activity feed, newest first and keyset-paginated
+on (event_time, id); `app_ids` narrows it to a batch of applications and
+`event_type` to one kind of event. List endpoints embed each application's
+event count, fetched for the whole page in one grouped query. Both read
+the columns of the response models (backend/schemas.py) as plain rows.
+"""
+
+from typing import Dict, List, Optional
+
+from fastapi import HTTPException
+from sqlalchemy import func
+from sqlmodel import select
+
+from backend.models import ApplicationTimeline
+from backend.schemas import TIMELINE_EVENT_COLUMNS
+
+# Applications per GET /timeline?app_ids= request
+MAX_APP_IDS = 100
+
+
+def parse_app_ids(raw: Optional[str]) -> List[int]:
+    """Parse "1,2,3" into ids; raises 400 on anything else or more than MAX_APP_IDS."""
+    if not raw:
+        return []
+    try:
+        app_ids = sorted({int(part) for part in raw.split(",") if part.strip()})
+    except ValueError:
+        raise HTTPException(status_code=400, detail="app_ids must be a comma-separated list of integers")
+    if len(app_ids) > MAX_APP_IDS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_APP_IDS} app_ids per request")
+    return app_ids
+
+
+def feed_query(user_id: int, app_ids: Optional[List[int]] = None, event_type: Optional[str] = None):
+    query = select(*TIMELINE_EVENT_COLUMNS).where(ApplicationTimeline.user_id == user_id)
+    if app_ids:
+        query = query.where(ApplicationTimeline.app_id.in_(app_ids))
+    if event_type:
+        query = query.where(ApplicationTimeline.event_type == event_type)
+    return query
+
+
+def event_counts(session, user_id: int, app_ids: List[int]) -> Dict[int, int]:
+    if not app_ids:
+        return {}
+    rows = session.exec(
+        select(ApplicationTimeline.app_id, func.count())
+        .where(ApplicationTimeline.app_id.in_(app_ids), ApplicationTimeline.user_id == user_id)
+        .group_by(ApplicationTimeline.app_id)
+    ).all()
+    return dict(rows)
+
+
+def with_event_counts(session, user_id: int, apps) -> List[dict]:
+    """A page of application rows (APPLICATION_COLUMNS) as dicts, each with its `event_count`."""
+    counts = event_counts(session, user_id, [app.id for app in apps])
+    return [{**app._mapping, "event_count": counts.get(app.id, 0)} for app in apps]
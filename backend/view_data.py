@@ -1,15 +1,53 @@
-from sqlmodel import Session, select
-from db import engine
-from models import User, Application
+"""
+Print users or applications as NDJSON, streamed from the database in chunks.
 
-with Session(engine) as session:
-    users = session.exec(select(User)).all()
-    apps = session.exec(select(Application)).all()
+Usage (from the repo root; reads DATABASE_URL like the app):
+    python -m backend.view_data users
+    python -m backend.view_data apps --user-id 3 --status pending
+    python -m backend.view_data apps --applied-from 2026-01-01 --applied-to 2026-02-01 --after-id 5000 --limit 1000
 
-    print("Users:")
-    for user in users:
-        print(user)
+Same rows, filters and pagination as GET /admin/apps and /admin/users (see
+backend/admin.py), but without a limit unless one is given. Memory stays
+flat however many rows are printed.
+"""
 
-    print("\nApplications:")
-    for app in apps:
-        print(app)
+import argparse
+import os
+import sys
+from datetime import datetime
+
+from backend import admin
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("table", choices=["apps", "users"])
+    parser.add_argument("--user-id", type=int)
+    parser.add_argument("--status")
+    parser.add_argument("--applied-from", type=datetime.fromisoformat, help="inclusive")
+    parser.add_argument("--applied-to", type=datetime.fromisoformat, help="exclusive")
+    parser.add_argument("--after-id", type=int, default=0, help="start after this id")
+    parser.add_argument("--limit", type=int, help="stop after this many rows")
+    args = parser.parse_args(argv)
+
+    if args.table == "apps":
+        filters = admin.AppFilters(
+            user_id=args.user_id, status=args.status, applied_from=args.applied_from, applied_to=args.applied_to,
+        )
+        chunks = admin.stream_apps(filters, args.after_id, args.limit)
+    else:
+        if args.user_id or args.status or args.applied_from or args.applied_to:
+            parser.error("filters apply to apps only")
+        chunks = admin.stream_users(args.after_id, args.limit)
+
+    try:
+        for chunk in chunks:
+            sys.stdout.write(chunk)
+    except BrokenPipeError:
+        # Piped into head and the like; keep the interpreter from failing on its final flush
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -9,7 +9,10 @@ AppTrackr Streamlit frontend
   * Date/time strings are expected in ISO format from the backend.
 """
 
+import os
+import time
 import streamlit as st
+import streamlit.components.v1 as components
 import requests
 import pandas as pd
 from datetime import date, timedelta, datetime
@@ -23,7 +26,15 @@ st_autorefresh(interval=30000)
 
 
 API_URL = "http://127.0.0.1:8000"
+# Address the *browser* uses to reach the backend (notification stream)
+PUBLIC_API_URL = os.getenv("PUBLIC_API_URL", API_URL)
 FORCE_NAV_KEY = "force_dashboard"
+APPS_PAGE_SIZE = 50
+# /apps pages the Metrics page loads to name activity and offer timelines, most recently updated first
+METRICS_APP_PAGES = 2
+# Seconds a link token must have left when put on the page: it is redrawn by
+# the next autorefresh (30 s), so the link still works until then
+LINK_TOKEN_MIN_LEFT = 35
 
 st.set_page_config(page_title="AppTrackr", layout="wide")
 
@@ -96,38 +107,136 @@ def show_signup():
                 st.error(f"Signup failed: {resp.text}")
 
 
-def fetch_apps(token):
+def cached_get(path, token, params=None):
+    """
+    GET with If-None-Match. The backend answers 304 when nothing changed since
+    the last poll, and the body cached in session state is reused.
+    Returns (status_code, json or None).
+    """
+    cache = st.session_state.setdefault("etag_cache", {})
+    key = (path, tuple(sorted((params or {}).items())))
     headers = {"Authorization": f"Bearer {token}"}
-    resp = requests.get(f"{API_URL}/apps", headers=headers)
+    if key in cache:
+        headers["If-None-Match"] = cache[key][0]
+    resp = requests.get(f"{API_URL}{path}", headers=headers, params=params)
+    if resp.status_code == 304 and key in cache:
+        return 200, cache[key][1]
     if resp.status_code == 200:
-        return resp.json()
+        body = resp.json()
+        if "ETag" in resp.headers:
+            cache[key] = (resp.headers["ETag"], body)
+        return 200, body
+    return resp.status_code, None
+
+def link_token(token, scope, min_left=LINK_TOKEN_MIN_LEFT):
+    """
+    A short-lived token from POST /link-token for a URL the browser opens by
+    itself (`scope`: "export" or "stream"), so the session token never goes
+    in a URL. Reused across reruns while it has `min_left` seconds left.
+    """
+    tokens = st.session_state.setdefault("link_tokens", {})
+    cached = tokens.get(scope)
+    if cached is None or cached[1] - time.time() < min_left:
+        headers = {"Authorization": f"Bearer {token}"}
+        resp = requests.post(f"{API_URL}/link-token", headers=headers, params={"scope": scope})
+        if not resp.ok:
+            return None
+        body = resp.json()
+        cached = tokens[scope] = (body["token"], time.time() + body["expires_in"])
+    return cached[0]
+
+def fetch_apps_page(token, status=None, cursor=None, limit=APPS_PAGE_SIZE):
+    params = {"limit": limit}
+    if status:
+        params["status"] = status
+    if cursor:
+        params["cursor"] = cursor
+    status_code, body = cached_get("/apps", token, params)
+    if status_code == 200:
+        return body
     else:
         st.error("Failed to fetch applications.")
-        return []
+        return {"items": [], "next_cursor": None}
+
+def fetch_apps(token, status=None, max_pages=None):
+    """
+    Follow /apps cursors for up to max_pages pages (all pages if None).
+    Returns (apps, next_cursor); next_cursor is None once everything is loaded.
+    """
+    apps, cursor, pages = [], None, 0
+    while True:
+        page = fetch_apps_page(token, status=status, cursor=cursor)
+        apps.extend(page["items"])
+        cursor = page["next_cursor"]
+        pages += 1
+        if not cursor or (max_pages is not None and pages >= max_pages):
+            return apps, cursor
+
+def search_apps(token, q, max_pages=1):
+    """Ranked /apps/search results for up to max_pages pages. Returns (apps, next_cursor)."""
+    headers = {"Authorization": f"Bearer {token}"}
+    apps, cursor = [], None
+    for _ in range(max_pages):
+        params = {"q": q}
+        if cursor:
+            params["cursor"] = cursor
+        resp = requests.get(f"{API_URL}/apps/search", headers=headers, params=params)
+        if resp.status_code != 200:
+            st.error("Search failed.")
+            return apps, None
+        page = resp.json()
+        apps.extend(page["items"])
+        cursor = page["next_cursor"]
+        if not cursor:
+            break
+    return apps, cursor
 
 def fetch_metrics(token):
-    headers = {"Authorization": f"Bearer {token}"}
-    resp = requests.get(f"{API_URL}/metrics", headers=headers)
-    if resp.status_code == 200:
-        return resp.json()
+    status_code, body = cached_get("/metrics", token)
+    if status_code == 200:
+        return body
     else:
         st.error("Failed to fetch metrics.")
         return {"applications_total": 0, "applications_by_status": {}}
     
-def fetch_app_timeline(app_id, token):
-    headers = {"Authorization": f"Bearer {token}"}
-    resp = requests.get(f"{API_URL}/apps/{app_id}/timeline", headers=headers)
-    if resp.status_code == 200:
-        return resp.json()
+def fetch_timeline(token, app_ids=None, limit=50):
+    """Newest-first events from /timeline, for the given applications or all of them."""
+    params = {"limit": limit}
+    if app_ids:
+        params["app_ids"] = ",".join(str(app_id) for app_id in app_ids)
+    status_code, body = cached_get("/timeline", token, params)
+    if status_code == 200:
+        return body["items"]
     else:
         st.error("Failed to fetch timeline.")
         return []
+
+def fetch_app_timeline(app_id, token):
+    """Every event of one application, following /timeline's cursor to the end."""
+    events, params = [], {"app_ids": str(app_id), "limit": 200}
+    while True:
+        status_code, body = cached_get("/timeline", token, params)
+        if status_code != 200:
+            st.error("Failed to fetch timeline.")
+            break
+        events.extend(body["items"])
+        if not body["next_cursor"]:
+            break
+        params = {**params, "cursor": body["next_cursor"]}
+    # Oldest first, as the timeline viewer lists them
+    return list(reversed(events))
     
 def add_app(data, token):
     headers = {"Authorization": f"Bearer {token}"}
     resp = requests.post(f"{API_URL}/apps", json=data, headers=headers)
     return resp
 
+def import_apps_csv(csv_file, token):
+    # File objects are sent as a streamed body, read by the backend as it arrives
+    headers = {"Authorization": f"Bearer {token}", "Content-Type": "text/csv"}
+    resp = requests.post(f"{API_URL}/apps/import", data=csv_file, headers=headers)
+    return resp
+
 def edit_app(app_id, data, token):
     headers = {"Authorization": f"Bearer {token}"}
     resp = requests.put(f"{API_URL}/apps/{app_id}", json=data, headers=headers)
@@ -142,16 +251,52 @@ def delete_app(app_id, token):
     return resp
 
 
-def get_notifications():
+def get_unread_count():
     token = st.session_state.get("token")
     if not token:
-        return []
+        return 0
     headers = {"Authorization": f"Bearer {token}"}
-    response = requests.get(f"{API_URL}/notifications", headers=headers)
+    response = requests.get(f"{API_URL}/notifications/unread-count", headers=headers)
     if response.ok:
-        return response.json()
+        return response.json()["unread"]
+    return 0
+
+def get_notifications():
+    token = st.session_state.get("token")
+    if not token:
+        return []
+    status_code, body = cached_get("/notifications", token)
+    if status_code == 200:
+        return body
     return []
 
+def live_notification_badge(token, initial_count):
+    """
+    Small browser-side widget next to the bell. It listens on the backend's
+    /notifications/stream (server-sent events) and bumps the unread count as
+    notifications arrive, without waiting for the next Streamlit rerun.
+
+    The stream takes a link token, checked when it connects. It is renewed
+    once expired, which redraws the widget and reconnects with the new one.
+    """
+    stream_token = link_token(token, "stream", min_left=0)
+    components.html(
+        f"""
+        <div style="font-family:sans-serif;font-size:14px;color:#555;padding-top:8px;">
+          <span id="count">{initial_count}</span> unread
+        </div>
+        <script>
+          let count = {initial_count};
+          const source = new EventSource("{PUBLIC_API_URL}/notifications/stream?token={stream_token}");
+          source.addEventListener("notification", () => {{
+            count += 1;
+            document.getElementById("count").textContent = count;
+          }});
+        </script>
+        """,
+        height=36,
+    )
+
 def mark_notifications_as_read():
     token = st.session_state.get("token")
     if not token:
@@ -196,7 +341,7 @@ st.sidebar.success(f"Welcome, {st.session_state.get('name', 'user').title()}")
 
 if st.sidebar.button("🚪 Logout"):
     # Clear user session data
-    for key in ["token", "email", "name", "nav", "notif_dropdown_open", "editing_id", "editing_tab_status"]:
+    for key in ["token", "email", "name", "nav", "notif_dropdown_open", "editing_id", "editing_row", "editing_tab_status", "etag_cache", "link_tokens"]:
         if key in st.session_state:
             del st.session_state[key]
     st.rerun()
@@ -204,22 +349,26 @@ if st.sidebar.button("🚪 Logout"):
 if "nav" not in st.session_state:
     st.session_state["nav"] = "Dashboard"
 
-notifications = get_notifications()
-
-notif_count = len(notifications)
+# The badge only needs a number; the messages are fetched when the panel is open
+notif_count = get_unread_count()
 bell_icon = "🔔"
 badge = f" {notif_count}" if notif_count > 0 else ""
 
 if "notif_dropdown_open" not in st.session_state:
     st.session_state["notif_dropdown_open"] = False
 
-if st.button(f"{bell_icon}{badge}", key="notif_bell"):
-    st.session_state["notif_dropdown_open"] = not st.session_state["notif_dropdown_open"]
-    st.rerun()
+col_bell, col_live = st.columns([1, 8])
+with col_bell:
+    if st.button(f"{bell_icon}{badge}", key="notif_bell"):
+        st.session_state["notif_dropdown_open"] = not st.session_state["notif_dropdown_open"]
+        st.rerun()
+with col_live:
+    live_notification_badge(st.session_state.token, notif_count)
 
 if st.session_state["notif_dropdown_open"]:
     print("Notifications panel open, count:", notif_count)
-    if notif_count == 0:
+    notifications = get_notifications()
+    if not notifications:
         st.info("No new notifications.")
     else:
         for notif in notifications:
@@ -265,16 +414,10 @@ if option == "Dashboard":
             run_automation_now()
             st.rerun()
 
-    apps = fetch_apps(st.session_state.token)
-    if apps:
-        df = pd.DataFrame(apps)
-
+    metrics = fetch_metrics(st.session_state.token)
+    if metrics["applications_total"]:
         today = date.today()
 
-        # Format applied_date and followup_date to show only date part
-        df['applied_date'] = pd.to_datetime(df['applied_date']).dt.date.astype(str)
-        df['followup_date'] = pd.to_datetime(df['followup_date']).dt.date.astype(str)
-
         # Status chip formatter
         def chip(s):
             color = {
@@ -287,26 +430,61 @@ if option == "Dashboard":
             }.get(s, "#d3d3d3")
             return f'<span style="background-color:{color};color:#222;padding:2px 8px;border-radius:8px;">{s.title()}</span>'
 
-        # Apply chips just for display, not for actual editing values
-        chip_df = df.copy()
-        chip_df["status_chip"] = chip_df["status"].apply(chip)
+        # --- SEARCH ---
+        search_q = st.text_input("🔍 Search applications", placeholder="Company, role, city, country or notes")
+        if search_q.strip():
+            if st.session_state.get("search_q") != search_q:
+                st.session_state["search_q"] = search_q
+                st.session_state["search_pages"] = 1
+            results, search_cursor = search_apps(
+                st.session_state.token, search_q, max_pages=st.session_state.get("search_pages", 1)
+            )
+            if results:
+                results_df = pd.DataFrame(results)
+                results_df["applied_date"] = pd.to_datetime(results_df["applied_date"]).dt.date.astype(str)
+                st.dataframe(
+                    results_df[["company_name", "role_title", "city", "country", "status", "applied_date", "notes"]],
+                    hide_index=True,
+                )
+                if search_cursor and st.button("More results"):
+                    st.session_state["search_pages"] = st.session_state.get("search_pages", 1) + 1
+                    st.rerun()
+            else:
+                st.caption("No matching applications.")
 
         statuses = ["All", "active", "pending", "followed-up", "not-responded", "rejected", "accepted"]
         tabs = st.tabs(statuses)
         for idx, status in enumerate(statuses):
             with tabs[idx]:
+                # Each tab asks the backend for its own status, one page at a time
+                pages_key = f"apps_pages_{status}"
+                tab_apps, next_cursor = fetch_apps(
+                    st.session_state.token,
+                    status=None if status == "All" else status,
+                    max_pages=st.session_state.get(pages_key, 1),
+                )
                 if status == "All":
-                    filtered_df = df
-                    filtered_chip_df = chip_df
+                    total = metrics["applications_total"]
                 else:
-                    filtered_df = df[df["status"] == status]
-                    filtered_chip_df = chip_df[chip_df["status"] == status]
+                    total = metrics["applications_by_status"].get(status, 0)
+
+                st.write(f"Showing {len(tab_apps)} of {total} applications with status: {status if status != 'All' else 'any'}")
+                if not tab_apps:
+                    continue
+
+                df = pd.DataFrame(tab_apps)
+
+                # Format applied_date and followup_date to show only date part
+                df['applied_date'] = pd.to_datetime(df['applied_date']).dt.date.astype(str)
+                df['followup_date'] = pd.to_datetime(df['followup_date']).dt.date.astype(str)
 
-                st.write(f"Showing {len(filtered_df)} applications with status: {status if status != 'All' else 'any'}")
+                # Apply chips just for display, not for actual editing values
+                chip_df = df.copy()
+                chip_df["status_chip"] = chip_df["status"].apply(chip)
 
                 display_cols = [
                     "company_name", "role_title", "salary", "city", "country",
-                    "applied_date", "followup_date", "status_chip", "followup_method", "notes"
+                    "applied_date", "followup_date", "status_chip", "followup_method", "notes", "event_count"
                 ]
 
                 # Render table using st.columns for native buttons
@@ -315,7 +493,7 @@ if option == "Dashboard":
                     header_cols[i].markdown(f"**{col.replace('_chip','').replace('_',' ').title()}**")
                 header_cols[-1].markdown("**Edit**")
 
-                for i, row in filtered_chip_df.iterrows():
+                for i, row in chip_df.iterrows():
                     row_cols = st.columns(len(display_cols) + 1)
                     for j, col in enumerate(display_cols):
                         row_cols[j].write(row[col], unsafe_allow_html=True)
@@ -323,13 +501,18 @@ if option == "Dashboard":
                     # True Streamlit button, not HTML
                     if row_cols[-1].button("Edit", key=f"editbtn_{row['id']}_{idx}"):
                         st.session_state['editing_id'] = row['id']
+                        st.session_state['editing_row'] = df.loc[i].to_dict()
                         st.session_state['editing_tab_status'] = status
                         st.rerun()
 
+                if next_cursor and st.button("Load more", key=f"load_more_{status}"):
+                    st.session_state[pages_key] = st.session_state.get(pages_key, 1) + 1
+                    st.rerun()
+
         # --- EDIT FORM --
         if 'editing_id' in st.session_state:
             editing_id = st.session_state['editing_id']
-            editing_row = df[df['id'] == editing_id].iloc[0]
+            editing_row = st.session_state['editing_row']
             st.markdown("---")
             st.subheader(f"Edit Application: {editing_row['company_name']} - {editing_row['role_title']}")
             with st.form("edit_application_form"):
@@ -373,6 +556,7 @@ if option == "Dashboard":
                     if resp.status_code == 200:
                         st.success("Application updated! Refresh to see changes.")
                         del st.session_state['editing_id']
+                        del st.session_state['editing_row']
                         del st.session_state['editing_tab_status']
                         st.session_state[FORCE_NAV_KEY] = True
                         st.rerun()
@@ -380,6 +564,7 @@ if option == "Dashboard":
                         st.error(f"Edit failed: {resp.text}")
                 elif cancel:
                     del st.session_state['editing_id']
+                    del st.session_state['editing_row']
                     del st.session_state['editing_tab_status']
                     st.rerun()
                 elif delete:
@@ -402,6 +587,7 @@ if option == "Dashboard":
                     st.success("Application deleted!")
                     st.session_state['confirm_delete'] = False
                     del st.session_state['editing_id']
+                    del st.session_state['editing_row']
                     del st.session_state['editing_tab_status']
                     st.session_state[FORCE_NAV_KEY] = True
                     st.rerun()
@@ -477,6 +663,27 @@ elif option == "Add Application":
                 else:
                     st.error(f"Application add failed: {resp.text}")
 
+    with st.expander("Import from CSV"):
+        st.caption(
+            "First row: column names matching the form fields "
+            "(company_name, role_title, city, country, applied_date, followup_date, "
+            "salary, status, followup_method, notes). Dates as YYYY-MM-DD."
+        )
+        csv_file = st.file_uploader("CSV file", type=["csv"])
+        if csv_file is not None and st.button("Import Applications"):
+            resp = import_apps_csv(csv_file, st.session_state.token)
+            if resp.status_code == 200:
+                report = resp.json()
+                st.success(f"Imported {report['created']} applications.")
+                if report["failed"]:
+                    st.warning(f"{report['failed']} rows were skipped.")
+                    st.dataframe(pd.DataFrame([
+                        {"Row": e["row"], "Problems": "; ".join(f"{p['field']}: {p['message']}" for p in e["errors"])}
+                        for e in report["errors"]
+                    ]), hide_index=True)
+            else:
+                st.error(f"Import failed: {resp.text}")
+
 elif option == "Metrics":
     st.header("📊 Application Metrics & Charts")
 
@@ -508,10 +715,26 @@ elif option == "Metrics":
     )
     st.altair_chart(chart, use_container_width=True)
 
+    st.markdown("---")
+    st.header("🕒 Recent Activity")
+    apps, more_apps = fetch_apps(st.session_state.token, max_pages=METRICS_APP_PAGES)
+    companies = {app["id"]: app["company_name"] for app in apps}
+    activity = fetch_timeline(st.session_state.token, limit=20)
+    if activity:
+        for event in activity:
+            time_str = pd.to_datetime(event["event_time"]).strftime("%Y-%m-%d %H:%M UTC")
+            company = companies.get(event["app_id"], f"Application {event['app_id']}")
+            st.markdown(
+                f"- **{company}**: {event.get('notes') or event['event_type']}  \n"
+                f"  <small style='color:gray;'>{time_str}</small>",
+                unsafe_allow_html=True,
+            )
+    else:
+        st.caption("No activity yet.")
+
     st.markdown("---")
     st.header("📜 Application Timeline Viewer")
 
-    apps = fetch_apps(st.session_state.token)  
     if apps:
         app_options = [
             {"id": app["id"], "label": f"{app['company_name']} – {app['role_title']}"}
@@ -521,6 +744,8 @@ elif option == "Metrics":
         app_ids = [a["id"] for a in app_options]
 
         selected_idx = st.selectbox("Select an application to view timeline", range(len(app_labels)), format_func=lambda i: app_labels[i], key="metrics_timeline_app")
+        if more_apps:
+            st.caption(f"Showing the {len(apps)} most recently updated applications.")
 
         selected_app_id = app_ids[selected_idx]
         app_info = next((a for a in apps if a["id"] == selected_app_id), None)
@@ -560,16 +785,15 @@ elif option == "Metrics":
 
 
         st.markdown("---")
-        df = pd.DataFrame(apps)
-
-        # --- EXPORT TO CSV BUTTON ---
-        csv = df.to_csv(index=False).encode('utf-8')
-        st.download_button(
-            label="📥 Export All Applications to CSV",
-            data=csv,
-            file_name="applications.csv",
-            mime='text/csv'
-        )
+
+        # --- EXPORT LINKS ---
+        # The browser downloads straight from the backend's streaming export,
+        # with a link token: URLs end up in access logs and browser history
+        export_token = link_token(st.session_state.token, "export")
+        export_url = f"{PUBLIC_API_URL}/apps/export?token={export_token}"
+        col_csv, col_ndjson = st.columns(2)
+        col_csv.link_button("📥 Export All Applications to CSV", f"{export_url}&format=csv")
+        col_ndjson.link_button("📥 Export as NDJSON", f"{export_url}&format=ndjson")
     else:
         st.info("You don’t have any applications yet.")
 
@@ -654,7 +878,7 @@ elif option == "Settings":
             resp = requests.delete(f"{API_URL}/me", headers=headers)
             if resp.status_code == 200:
                 st.success("Account deleted. Goodbye!")
-                for key in ["token", "email", "name", "nav", "notif_dropdown_open", "editing_id", "editing_tab_status", "show_delete_confirm"]:
+                for key in ["token", "email", "name", "nav", "notif_dropdown_open", "editing_id", "editing_row", "editing_tab_status", "show_delete_confirm", "etag_cache"]:
                     if key in st.session_state:
                         del st.session_state[key]
                 st.rerun()
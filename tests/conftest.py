@@ -0,0 +1,31 @@
+import os
+import tempfile
+
+import pytest
+
+# backend.db binds its engine to DATABASE_URL, and backend.admin reads
+# ADMIN_USER_IDS, when first imported: set both before any test imports them
+_scratch = tempfile.mkdtemp(prefix="apptrackr-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_scratch, 'test.db')}"
+os.environ["ADMIN_USER_IDS"] = "1"
+
+
+@pytest.fixture(scope="session")
+def client():
+    from fastapi.testclient import TestClient
+    from backend.main import app
+
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture(scope="session")
+def signup(client):
+    """signup(email) -> (user id, auth headers) for a new account."""
+    def signup(email: str, password: str = "TestPassw0rd"):
+        response = client.post("/signup", json={"email": email, "password": password, "name": "Test User"})
+        assert response.status_code == 200, response.text
+        token = client.post("/login", json={"email": email, "password": password}).json()["token"]
+        return response.json()["id"], {"Authorization": f"Bearer {token}"}
+
+    return signup
@@ -0,0 +1,18 @@
+def test_admin_access_is_by_user_id(client, signup):
+    admin_id, admin = signup("admin@example.com")
+    assert admin_id == 1
+    assert client.get("/admin/users", headers=admin).status_code == 200
+
+    # A case variant of the admin's address is a different account
+    variant_id, variant = signup("Admin@example.com")
+    assert variant_id != admin_id
+    assert client.get("/admin/users", headers=variant).status_code == 403
+    assert client.get("/admin/apps", headers=variant).status_code == 403
+
+    # and changing its address does not make it one either
+    assert client.put("/me", headers=variant, json={"email": "ADMIN@EXAMPLE.COM"}).status_code == 200
+    assert client.get("/admin/users", headers=variant).status_code == 403
+
+
+def test_admin_endpoints_need_a_token(client):
+    assert client.get("/admin/users").status_code == 401
@@ -0,0 +1,41 @@
+import pytest
+from sqlalchemy import update
+
+from backend.cache import CacheBackend, MemoryCache
+from backend.models import Application
+
+
+def test_cached_reads_follow_writes_made_elsewhere(client, signup):
+    """A write that skips read_cache.invalidate(), as one on another worker would, still shows at once."""
+    from backend.db import engine
+
+    _, headers = signup("cache@example.com")
+    app_id = client.post("/apps", headers=headers, json={
+        "company_name": "Acme", "role_title": "Engineer", "city": "Remote", "country": "India",
+        "applied_date": "2026-01-01T00:00:00", "followup_date": "2026-02-01T00:00:00",
+    }).json()["id"]
+    first = client.get("/apps", headers=headers)
+    assert first.json()["items"][0]["status"] == "pending"
+    assert client.get("/apps", headers=headers).json() == first.json()
+
+    with engine.begin() as conn:
+        conn.execute(update(Application).where(Application.id == app_id).values(status="rejected"))
+
+    stale_etag = {**headers, "If-None-Match": first.headers["etag"]}
+    response = client.get("/apps", headers=stale_etag)
+    assert response.status_code == 200
+    assert response.json()["items"][0]["status"] == "rejected"
+    assert client.get("/metrics", headers=headers).json()["applications_by_status"]["rejected"] == 1
+
+
+def test_incomplete_backend_fails_when_created():
+    class Partial(CacheBackend):
+        def get(self, key):
+            return None
+
+        def set(self, key, value, ttl):
+            pass
+
+    with pytest.raises(TypeError):
+        Partial()
+    assert len(MemoryCache()) == 0
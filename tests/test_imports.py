@@ -0,0 +1,35 @@
+import time
+
+HEADER = "company_name,role_title,city,country,applied_date,followup_date,notes\n"
+
+
+def row(company: str, notes: str = "") -> str:
+    return f"{company},Engineer,Remote,India,2026-01-01T00:00:00,2026-02-01T00:00:00,{notes}\n"
+
+
+def upload(client, headers, body: str):
+    return client.post("/apps/import", headers={**headers, "Content-Type": "text/csv"}, content=body.encode())
+
+
+def test_quoted_line_breaks_stay_in_their_cell(client, signup):
+    _, headers = signup("import-quoted@example.com")
+    report = upload(client, headers, HEADER + row("Acme", '"first line\nsecond, with ""quotes"""') + row("Globex")).json()
+    assert report == {"created": 2, "failed": 0, "errors": []}
+    notes = {app["company_name"]: app["notes"] for app in client.get("/apps", headers=headers).json()["items"]}
+    assert notes["Acme"] == 'first line\nsecond, with "quotes"'
+
+
+def test_unbalanced_quote_is_one_bad_row(client, signup):
+    """A stray quote holds back the lines after it only up to MAX_RECORD_BYTES, read in linear time."""
+    _, headers = signup("import-stray-quote@example.com")
+    rows = 5000
+    body = HEADER + row("Acme", '27" monitor') + "".join(row(f"Company {n}") for n in range(rows))
+
+    started = time.monotonic()
+    report = upload(client, headers, body).json()
+    assert time.monotonic() - started < 30
+
+    assert report["created"] == rows
+    assert report["failed"] == 1
+    assert report["errors"][0]["row"] == 2
+    assert "longer than" in report["errors"][0]["errors"][0]["message"]
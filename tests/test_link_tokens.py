@@ -0,0 +1,42 @@
+import jwt
+
+
+def link_token(client, headers, scope: str) -> str:
+    response = client.post("/link-token", headers=headers, params={"scope": scope})
+    assert response.status_code == 200, response.text
+    return response.json()["token"]
+
+
+def test_export_accepts_an_export_link_token(client, signup):
+    _, headers = signup("link-export@example.com")
+    token = link_token(client, headers, "export")
+    response = client.get("/apps/export", params={"token": token, "format": "csv"})
+    assert response.status_code == 200
+    assert response.text.startswith("id,")
+
+
+def test_session_token_is_refused_in_the_query_string(client, signup):
+    _, headers = signup("link-session@example.com")
+    session_token = headers["Authorization"].removeprefix("Bearer ")
+    assert client.get("/apps/export", params={"token": session_token}).status_code == 401
+    assert client.get("/apps/export", headers=headers).status_code == 200
+
+
+def test_link_token_is_not_a_session_token(client, signup):
+    from backend.main import ALGORITHM, SECRET_KEY
+
+    _, headers = signup("link-scope@example.com")
+    token = link_token(client, headers, "export")
+    assert client.get("/apps", headers={"Authorization": f"Bearer {token}"}).status_code == 401
+    # Even with the claims a session token has
+    claims = {**jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM]), "email": "link-scope@example.com"}
+    forged = jwt.encode(claims, SECRET_KEY, algorithm=ALGORITHM)
+    assert client.get("/apps", headers={"Authorization": f"Bearer {forged}"}).status_code == 401
+    assert client.post("/link-token", headers=headers, params={"scope": "admin"}).status_code == 400
+
+
+def test_stream_takes_only_a_stream_link_token(client, signup):
+    _, headers = signup("link-stream@example.com")
+    session_token = headers["Authorization"].removeprefix("Bearer ")
+    for token in (session_token, link_token(client, headers, "export")):
+        assert client.get("/notifications/stream", params={"token": token}).status_code == 401
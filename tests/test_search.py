@@ -0,0 +1,37 @@
+import base64
+import json
+
+import pytest
+
+from backend import search
+
+
+def make_cursor(*fields) -> str:
+    return base64.urlsafe_b64encode(json.dumps(fields).encode()).decode().rstrip("=")
+
+
+def add_apps(client, headers, companies):
+    return [
+        client.post("/apps", headers=headers, json={
+            "company_name": company, "role_title": "Data Engineer", "city": "Remote", "country": "India",
+            "applied_date": "2026-01-01T00:00:00", "followup_date": "2026-02-01T00:00:00",
+        }).json()["id"]
+        for company in companies
+    ]
+
+
+@pytest.mark.parametrize("index, score", enumerate([None, "1.5", True, [1.0]]))
+def test_crafted_cursor_score_is_rejected(client, signup, index, score):
+    _, headers = signup(f"search-cursor-{index}@example.com")
+    add_apps(client, headers, ["Acme"])
+    response = client.get("/apps/search", headers=headers, params={"q": "data", "cursor": make_cursor("score", score, 1)})
+    assert response.status_code == 400
+
+
+def test_capped_search_keeps_the_newest_matches(client, signup, monkeypatch):
+    _, headers = signup("search-cap@example.com")
+    ids = add_apps(client, headers, ["Acme", "Globex", "Initech"])
+    monkeypatch.setattr(search, "MAX_CANDIDATES", 2)
+    response = client.get("/apps/search", headers=headers, params={"q": "engineer"})
+    assert response.status_code == 200
+    assert sorted(item["id"] for item in response.json()["items"]) == ids[1:]